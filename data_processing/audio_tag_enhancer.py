@@ -5,11 +5,21 @@ Step 2: Enhance dialogue with ElevenLabs v3 audio tags using LLM
 
 import json
 import logging
-from typing import Dict, List, Any
-import google.generativeai as genai
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 import os
 
+from context_cache import ContextCachedModel, get_generative_model
+from disk_cache import DiskCache, make_cache_key
+from gemini_throttle import RequestPacer, call_with_retry, estimate_tokens
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to stdlib json
+    orjson = None
+
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
@@ -17,47 +27,11 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Matches a response wrapped in a markdown code fence, capturing the body
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.S)
 
-class AudioTagEnhancer:
-    """Handles enhancement of dialogue with ElevenLabs v3 audio tags"""
-    
-    def __init__(self, api_key: str = None, model_name: str = "gemini-2.5-flash-lite"):
-        """
-        Initialize audio tag enhancer
-        
-        Args:
-            api_key: Google AI API key
-            model_name: Gemini model to use for text enhancement
-        """
-        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
-            raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable.")
-        
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(model_name)
-        
-        logger.info(f"Initialized Audio Tag Enhancer with model: {model_name}")
-    
-    def enhance_all_dialogue_at_once(self, all_dialogue_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Enhance ALL dialogue from all pages in a single API call (OPTIMAL APPROACH)
-        
-        Args:
-            all_dialogue_data: List of all dialogue items from all pages
-            
-        Returns:
-            List of enhanced dialogue items in the same order
-        """
-        try:
-            logger.info(f"Enhancing ALL {len(all_dialogue_data)} dialogue lines in single API call...")
-            
-            if not all_dialogue_data:
-                logger.warning("No dialogue found to enhance")
-                return all_dialogue_data
-            
-            # Create comprehensive enhancement prompt for ALL dialogue
-            enhancement_prompt = f"""
+# Static instructions shared by every enhancement request
+_ENHANCEMENT_INSTRUCTIONS = """
 # Instructions
 
 ## 1. Role and Goal
@@ -164,29 +138,26 @@ Use these as a guide. You can infer similar, contextually appropriate **audio ta
 2. Enhance emphasis without altering meaning or text.
 3. Reply ONLY with the enhanced text.
 
+"""
+
+# Per-request prompt pieces, formatted with the dialogue of each call
+_ENHANCEMENT_PROMPT_HEADER = """
 DIALOGUE TO ENHANCE (ALL PAGES):
 """
-            
-            # Add each dialogue line to the prompt
-            for i, dialogue in enumerate(all_dialogue_data, 1):
-                speaker = dialogue["speaker"]
-                text = dialogue["text"]
-                emotion = dialogue.get("emotion", "neutral")
-                page_number = dialogue.get("page_number", "unknown")
-                
-                enhancement_prompt += f"""
-{i}. Page {page_number} - Speaker: {speaker}
+
+_ENHANCEMENT_LINE_TEMPLATE = """
+{index}. Page {page_number} - Speaker: {speaker}
    Emotion: {emotion}
    Text: "{text}"
 """
-            
-            enhancement_prompt += f"""
+
+_ENHANCEMENT_OUTPUT_FORMAT = """
 
 CRITICAL OUTPUT FORMAT REQUIREMENTS:
 1. Return ONLY a valid JSON array
 2. Each element must be a string with audio tags
 3. Maintain exact order of input dialogue
-4. Return exactly {len(all_dialogue_data)} elements
+4. Return exactly {line_count} elements
 5. Each string must be properly escaped for JSON
 
 REQUIRED JSON FORMAT:
@@ -201,14 +172,95 @@ IMPORTANT:
 - Use double quotes for JSON strings
 - Escape any quotes inside dialogue with backslash
 - Do not include any text before or after the JSON array
-- Ensure all {len(all_dialogue_data)} dialogue lines are included
+- Ensure all {line_count} dialogue lines are included
 - Maintain the exact order as provided in the input
 
 Return ONLY the JSON array, nothing else.
 """
+
+
+class AudioTagEnhancer:
+    """Handles enhancement of dialogue with ElevenLabs v3 audio tags"""
+    
+    def __init__(self, api_key: str = None, model_name: str = "gemini-2.5-flash-lite", cache_dir: Optional[str] = None,
+                 use_context_cache: bool = True, max_retries: int = 5, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        """
+        Initialize audio tag enhancer
+        
+        Args:
+            api_key: Google AI API key
+            model_name: Gemini model to use for text enhancement
+            cache_dir: Optional directory where enhancement results are cached across runs
+            use_context_cache: Upload the static instructions once as Gemini cached content
+            max_retries: Retries with exponential backoff when Gemini rate limits or is overloaded
+            requests_per_minute: Optional cap used to pace Gemini requests proactively
+            tokens_per_minute: Optional input token budget used to pace Gemini requests proactively
+        """
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if not self.api_key:
+            raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable.")
+        
+        # Configure Gemini (models are shared with any other enhancer in this process)
+        self.model_name = model_name
+        self.model = get_generative_model(model_name, self.api_key)
+        
+        # Static instructions are sent once through context caching when available
+        self._instructions_model = ContextCachedModel(model_name, _ENHANCEMENT_INSTRUCTIONS, use_cache=use_context_cache)
+        self._result_cache = DiskCache(cache_dir) if cache_dir else None
+        self.max_retries = max(0, max_retries)
+        self._pacer = RequestPacer(requests_per_minute, tokens_per_minute) if requests_per_minute or tokens_per_minute else None
+        
+        logger.info(f"Initialized Audio Tag Enhancer with model: {model_name}")
+    
+    def enhance_all_dialogue_at_once(self, all_dialogue_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Enhance ALL dialogue from all pages in a single API call (OPTIMAL APPROACH)
+        
+        Args:
+            all_dialogue_data: List of all dialogue items from all pages
+            
+        Returns:
+            List of enhanced dialogue items in the same order
+        """
+        try:
+            logger.info(f"Enhancing ALL {len(all_dialogue_data)} dialogue lines in single API call...")
+            
+            if not all_dialogue_data:
+                logger.warning("No dialogue found to enhance")
+                return all_dialogue_data
+            
+            # Create comprehensive enhancement prompt for ALL dialogue
+            # Static instructions are sent separately (cached when possible)
+            prompt_parts = [_ENHANCEMENT_PROMPT_HEADER]
+            
+            # Add each dialogue line to the prompt
+            for i, dialogue in enumerate(all_dialogue_data, 1):
+                prompt_parts.append(_ENHANCEMENT_LINE_TEMPLATE.format(
+                    index=i,
+                    page_number=dialogue.get("page_number", "unknown"),
+                    speaker=dialogue["speaker"],
+                    emotion=dialogue.get("emotion", "neutral"),
+                    text=dialogue["text"]
+                ))
+            
+            prompt_parts.append(_ENHANCEMENT_OUTPUT_FORMAT.format(line_count=len(all_dialogue_data)))
+            enhancement_prompt = "".join(prompt_parts)
+            
+            # The prompt carries every input, so identical prompts give reusable results
+            cache_key = None
+            if self._result_cache is not None:
+                cache_key = make_cache_key("enhancement", self.model_name, _ENHANCEMENT_INSTRUCTIONS, enhancement_prompt)
+                cached_texts = self._result_cache.get(cache_key)
+                if cached_texts is not None and len(cached_texts) == len(all_dialogue_data):
+                    logger.info(f"Reusing cached enhancement for {len(cached_texts)} dialogue lines")
+                    return self._apply_enhanced_texts(all_dialogue_data, cached_texts)
             
             # Get enhancement from LLM
-            response = self.model.generate_content(enhancement_prompt)
+            response = call_with_retry(
+                lambda: self._instructions_model.generate_content(
+                    enhancement_prompt, generation_config={"response_mime_type": "application/json"}),
+                self.max_retries, self._pacer, estimate_tokens(enhancement_prompt))
             
             if not response.text:
                 logger.warning(f"No enhancement received for {len(all_dialogue_data)} dialogue lines")
@@ -216,16 +268,9 @@ Return ONLY the JSON array, nothing else.
             
             # Parse JSON response with robust error handling
             try:
-                response_text = response.text.strip()
-                
-                # Remove common prefixes/suffixes that might cause parsing issues
-                if response_text.startswith("```json"):
-                    response_text = response_text[7:]
-                elif response_text.startswith("```"):
-                    response_text = response_text[3:]
-                
-                if response_text.endswith("```"):
-                    response_text = response_text[:-3]
+                # Remove markdown code fences that might cause parsing issues
+                match = _FENCE_RE.match(response.text)
+                response_text = match.group(1) if match else response.text.strip()
                 
                 # Find JSON array boundaries
                 start_idx = response_text.find('[')
@@ -238,7 +283,7 @@ Return ONLY the JSON array, nothing else.
                 response_text = response_text.strip()
                 
                 # Parse the JSON
-                enhanced_texts = json.loads(response_text)
+                enhanced_texts = orjson.loads(response_text) if orjson is not None else json.loads(response_text)
                 
                 # Validate response size
                 if len(enhanced_texts) != len(all_dialogue_data):
@@ -250,12 +295,10 @@ Return ONLY the JSON array, nothing else.
                     logger.warning("Some enhanced texts are not strings")
                     return all_dialogue_data
                 
-                # Create enhanced dialogue entries
-                enhanced_dialogue = []
-                for i, dialogue in enumerate(all_dialogue_data):
-                    enhanced_dialogue_item = dialogue.copy()
-                    enhanced_dialogue_item["text"] = enhanced_texts[i]
-                    enhanced_dialogue.append(enhanced_dialogue_item)
+                if cache_key is not None:
+                    self._result_cache.set(cache_key, enhanced_texts)
+                
+                enhanced_dialogue = self._apply_enhanced_texts(all_dialogue_data, enhanced_texts)
                 
                 logger.info(f"Successfully enhanced {len(enhanced_dialogue)} dialogue lines in single API call")
                 return enhanced_dialogue
@@ -266,4 +309,57 @@ Return ONLY the JSON array, nothing else.
                 
         except Exception as e:
             logger.error(f"Error enhancing all dialogue at once: {str(e)}")
-            return all_dialogue_data
\ No newline at end of file
+            return all_dialogue_data
+    
+    def enhance_all_dialogue_parallel(self, all_dialogue_data: List[Dict[str, Any]], batch_size: int = 100,
+                                      max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Enhance dialogue in chunks of batch_size lines, with several chunks in flight at once
+        
+        Args:
+            all_dialogue_data: List of all dialogue items from all pages
+            batch_size: Dialogue lines per API call
+            max_concurrency: Maximum number of concurrent API calls
+            
+        Returns:
+            List of enhanced dialogue items in the same order
+        """
+        if len(all_dialogue_data) <= batch_size:
+            return self.enhance_all_dialogue_at_once(all_dialogue_data)
+        
+        chunks = [all_dialogue_data[i:i + batch_size] for i in range(0, len(all_dialogue_data), batch_size)]
+        logger.info(f"Enhancing {len(all_dialogue_data)} dialogue lines in {len(chunks)} parallel chunks...")
+        
+        def enhance_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # A failed chunk comes back as the input list itself, give it one more try on its own
+            enhanced = self.enhance_all_dialogue_at_once(chunk)
+            if enhanced is chunk:
+                logger.warning(f"Retrying enhancement of a {len(chunk)} line chunk")
+                enhanced = self.enhance_all_dialogue_at_once(chunk)
+            return enhanced
+        
+        # map keeps the chunk order, so the result lines up with the input
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(chunks)), thread_name_prefix="enhance-chunk") as pool:
+            return [item for enhanced_chunk in pool.map(enhance_chunk, chunks) for item in enhanced_chunk]
+    
+    def release_context_cache(self):
+        """Delete the cached instructions once no more scenes will be enhanced"""
+        self._instructions_model.delete()
+    
+    def _apply_enhanced_texts(self, all_dialogue_data: List[Dict[str, Any]], enhanced_texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Create enhanced dialogue entries with the tagged texts
+        
+        Args:
+            all_dialogue_data: Original dialogue items
+            enhanced_texts: Tagged text for each item, in the same order
+            
+        Returns:
+            Copies of the dialogue items with enhanced text
+        """
+        enhanced_dialogue = []
+        for dialogue, enhanced_text in zip(all_dialogue_data, enhanced_texts):
+            enhanced_dialogue_item = dialogue.copy()
+            enhanced_dialogue_item["text"] = enhanced_text
+            enhanced_dialogue.append(enhanced_dialogue_item)
+        return enhanced_dialogue
\ No newline at end of file
@@ -5,12 +5,14 @@ Manages character consistency and voice assignments across entire scenes/chapter
 
 import json
 import logging
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Set
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter
 
-from voice_registry import VoiceRegistry
+from voice_registry import get_default_registry, FEMALE_NAME_RE
+from shared_json_file import locked_file, read_json_file, write_json_atomic
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -29,7 +31,10 @@ class CharacterConsistencyManager:
         """
         self.registry_file = Path(registry_file)
         self.consistency_data = self._load_consistency_data()
-        self.voice_registry = VoiceRegistry()
+        self.voice_registry = get_default_registry()
+        
+        # Memoized get_character_statistics result, cleared whenever a scene is registered
+        self._statistics_cache: Optional[Dict[str, Any]] = None
         
         logger.info("Character Consistency Manager initialized")
     
@@ -59,15 +64,41 @@ class CharacterConsistencyManager:
             }
     
     def _save_consistency_data(self):
-        """Save character consistency data to file"""
+        """Save character consistency data to file, merging scenes other processes saved in the meantime"""
         try:
             self.registry_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
-                json.dump(self.consistency_data, f, indent=2, ensure_ascii=False)
+            with locked_file(self.registry_file):
+                saved_data = read_json_file(self.registry_file)
+                if saved_data:
+                    self._merge_saved_data(saved_data)
+                write_json_atomic(self.registry_file, self.consistency_data)
             logger.info(f"Character consistency data saved to {self.registry_file}")
         except Exception as e:
             logger.error(f"Error saving character consistency data: {e}")
     
+    def _merge_saved_data(self, saved_data: Dict[str, Any]):
+        """
+        Take over scenes and characters from the saved consistency data (callers hold the lock)
+        
+        Args:
+            saved_data: Consistency data currently on disk
+        """
+        for section in ("scenes", "voice_assignments", "consistency_rules"):
+            self.consistency_data[section] = {**saved_data.get(section, {}), **self.consistency_data.get(section, {})}
+        
+        characters = self.consistency_data["characters"]
+        for char_name, saved_character in saved_data.get("characters", {}).items():
+            character = characters.get(char_name)
+            if character is None:
+                characters[char_name] = saved_character
+                continue
+            
+            # Both sides saw the character; keep the scenes either of them registered
+            scenes = list(saved_character.get("scenes", []))
+            scenes.extend(scene for scene in character["scenes"] if scene not in scenes)
+            character["scenes"] = scenes
+            character["first_seen"] = min(character["first_seen"], saved_character.get("first_seen", character["first_seen"]))
+    
     def register_scene_characters(self, scene_id: str, scene_analysis: Dict[str, Any]) -> Dict[str, str]:
         """
         Register characters from a scene analysis and assign consistent voices
@@ -81,6 +112,7 @@ class CharacterConsistencyManager:
         """
         try:
             logger.info(f"Registering characters for scene: {scene_id}")
+            self._statistics_cache = None
             
             # Extract character information
             characters = scene_analysis["characters"]["all_characters"]
@@ -163,7 +195,7 @@ class CharacterConsistencyManager:
         name_lower = char_name.lower()
         
         # Female name patterns
-        if any(keyword in name_lower for keyword in ["mikasa", "mrs", "miss", "lady", "woman", "girl", "female", "mother", "sister", "daughter"]):
+        if FEMALE_NAME_RE.search(name_lower):
             return "female"
         
         # Default to male for unknown
@@ -236,13 +268,8 @@ class CharacterConsistencyManager:
         Returns:
             Similarity score (0.0 to 1.0)
         """
-        similarity_score = 0.0
-        
         # Name similarity (simple string matching)
-        if char1_name.lower() == char2_name.lower():
-            similarity_score += 0.4
-        elif char1_name.lower() in char2_name.lower() or char2_name.lower() in char1_name.lower():
-            similarity_score += 0.2
+        similarity_score = self._name_similarity(char1_name, char2_name)
         
         # Character type similarity
         char1_type = char1_data.get("importance", "background")
@@ -264,6 +291,31 @@ class CharacterConsistencyManager:
         
         return min(similarity_score, 1.0)
     
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _name_similarity(char1_name: str, char2_name: str) -> float:
+        """
+        Score how closely two character names match
+        
+        The same name pairs come up again for every scene registered against
+        the known cast, so results are memoized on the (name, name) pair.
+        
+        Args:
+            char1_name: First character name
+            char2_name: Second character name
+            
+        Returns:
+            0.4 for an exact match, 0.2 if one name contains the other, else 0.0
+        """
+        name1 = char1_name.lower()
+        name2 = char2_name.lower()
+        
+        if name1 == name2:
+            return 0.4
+        if name1 in name2 or name2 in name1:
+            return 0.2
+        return 0.0
+    
     def get_character_voice(self, char_name: str, scene_id: str = None) -> Optional[str]:
         """
         Get voice assignment for a character
@@ -303,55 +355,36 @@ class CharacterConsistencyManager:
         Returns:
             Character statistics
         """
+        if self._statistics_cache is not None:
+            return dict(self._statistics_cache)
+        
         characters = self.consistency_data["characters"]
         scenes = self.consistency_data["scenes"]
         
-        # Count characters by type
-        character_types = defaultdict(int)
-        for char_data in characters.values():
-            character_types[char_data.get("character_type", "unknown")] += 1
-        
-        # Count voices used
-        voices_used = set()
-        for char_data in characters.values():
-            voices_used.add(char_data.get("voice_id", "unknown"))
+        # Counter does the tallying in C; the voice counts give both the distribution and the voices used
+        character_types = Counter(char_data.get("character_type", "unknown") for char_data in characters.values())
+        voice_distribution = Counter(char_data.get("voice_id", "unknown") for char_data in characters.values())
         
-        return {
+        self._statistics_cache = {
             "total_characters": len(characters),
             "total_scenes": len(scenes),
             "character_types": dict(character_types),
-            "unique_voices_used": len(voices_used),
-            "voices_list": list(voices_used),
+            "unique_voices_used": len(voice_distribution),
+            "voices_list": list(voice_distribution),
             "most_appearing_character": self._get_most_appearing_character(),
-            "voice_distribution": self._get_voice_distribution()
+            "voice_distribution": dict(voice_distribution)
         }
+        return dict(self._statistics_cache)
     
     def _get_most_appearing_character(self) -> Optional[str]:
         """Get the character that appears in the most scenes"""
-        if not self.consistency_data["characters"]:
+        characters = self.consistency_data["characters"]
+        # max keeps the first of equally frequent characters; characters without scenes never count
+        most_appearing = max(characters, key=lambda char_name: len(characters[char_name].get("scenes", [])), default=None)
+        if most_appearing is None or not characters[most_appearing].get("scenes"):
             return None
-        
-        most_scenes = 0
-        most_appearing = None
-        
-        for char_name, char_data in self.consistency_data["characters"].items():
-            scene_count = len(char_data.get("scenes", []))
-            if scene_count > most_scenes:
-                most_scenes = scene_count
-                most_appearing = char_name
-        
         return most_appearing
     
-    def _get_voice_distribution(self) -> Dict[str, int]:
-        """Get distribution of characters per voice"""
-        voice_distribution = defaultdict(int)
-        
-        for char_data in self.consistency_data["characters"].values():
-            voice_id = char_data.get("voice_id", "unknown")
-            voice_distribution[voice_id] += 1
-        
-        return dict(voice_distribution)
-    
     def export_consistency_report(self, output_file: str = "character_consistency_report.json"):
         """
         Export a comprehensive character consistency report
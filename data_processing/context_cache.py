@@ -0,0 +1,178 @@
+"""
+Gemini Context Cache Helper
+Sends a static system instruction through Gemini context caching, falling back to inline instructions,
+and shares plain Gemini models across the components of a process
+"""
+
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Part of every cache name; bump it when the way instructions are cached changes
+_CACHE_NAME_VERSION = "v1"
+
+# A cache this close to expiring is not worth reusing
+_MIN_REMAINING_TTL = timedelta(minutes=5)
+
+# Plain models by name, shared by every analyzer and enhancer in the process
+_MODEL_CACHE: Dict[str, Any] = {}
+_configured_api_key: Optional[str] = None
+_model_lock = threading.Lock()
+
+
+def get_generative_model(model_name: str, api_key: str) -> Any:
+    """
+    Get a shared Gemini model, configuring the client only when the API key changes
+    
+    Args:
+        model_name: Gemini model name
+        api_key: Google AI API key
+        
+    Returns:
+        GenerativeModel for model_name
+    """
+    global _configured_api_key
+    with _model_lock:
+        if api_key != _configured_api_key:
+            # genai.configure is process-wide, models built under another key must not be handed out
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+            _MODEL_CACHE.clear()
+        
+        model = _MODEL_CACHE.get(model_name)
+        if model is None:
+            model = _MODEL_CACHE[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+
+class ContextCachedModel:
+    """Gemini model whose system instruction is uploaded once as cached content"""
+    
+    def __init__(self, model_name: str, system_instruction: str, ttl: timedelta = timedelta(hours=1),
+                 use_cache: bool = True):
+        """
+        Initialize context cached model
+        
+        Args:
+            model_name: Gemini model name
+            system_instruction: Static instruction shared by every request
+            ttl: Lifetime of the cached content
+            use_cache: Whether to try context caching at all (False always sends instructions inline)
+        """
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.ttl = ttl
+        # Stable name derived from the contents, so a restarted run can find a cache that is still alive
+        instruction_digest = hashlib.sha256(f"{model_name}\0{system_instruction}".encode("utf-8")).hexdigest()
+        self.display_name = f"{_CACHE_NAME_VERSION}-sys-{instruction_digest[:32]}"
+        
+        # Used whenever the cache cannot be created or has expired
+        self.inline_model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+        
+        self._cached_content = None
+        self._cached_model = None
+        # Only caches created here are deleted, a reused one may still be serving other processes
+        self._owns_cache = False
+        self._cache_unavailable = not use_cache
+        self._lock = threading.Lock()
+    
+    def _get_cached_model(self):
+        """
+        Get the model bound to the cached instruction, creating the cache on first use
+        
+        Returns:
+            Cached GenerativeModel, or None if context caching is unavailable
+        """
+        with self._lock:
+            if self._cached_model is None and not self._cache_unavailable:
+                try:
+                    self._cached_content = self._find_live_cache()
+                    self._owns_cache = self._cached_content is None
+                    if self._cached_content is not None:
+                        logger.info(f"Reusing context cache {self._cached_content.name} for {self.model_name}")
+                    else:
+                        self._cached_content = genai.caching.CachedContent.create(
+                            model=self.model_name,
+                            display_name=self.display_name,
+                            system_instruction=self.system_instruction,
+                            ttl=self.ttl
+                        )
+                        logger.info(f"Created context cache {self._cached_content.name} for {self.model_name}")
+                    self._cached_model = genai.GenerativeModel.from_cached_content(cached_content=self._cached_content)
+                except Exception as e:
+                    # Older SDKs, unsupported models and instructions below the minimum cache size end up here
+                    logger.warning(f"Context caching unavailable for {self.model_name}, sending instructions inline: {e}")
+                    self._cache_unavailable = True
+            return self._cached_model
+    
+    def _find_live_cache(self):
+        """
+        Look for cached content with the same instruction left behind by an earlier run
+        
+        Returns:
+            Matching CachedContent with enough lifetime left, or None
+        """
+        try:
+            min_expire_time = datetime.now(timezone.utc) + _MIN_REMAINING_TTL
+            for cached_content in genai.caching.CachedContent.list():
+                if (cached_content.display_name == self.display_name
+                        and cached_content.model.endswith(self.model_name)
+                        and cached_content.expire_time > min_expire_time):
+                    return cached_content
+        except Exception as e:
+            logger.debug("Could not list context caches: %s", e)
+        return None
+    
+    def generate_content(self, contents: Any, **kwargs) -> Any:
+        """
+        Generate content, reusing the cached instruction when possible
+        
+        Args:
+            contents: Request-specific contents
+            **kwargs: Extra arguments for GenerativeModel.generate_content
+            
+        Returns:
+            Gemini response (the list of chunks, already received, for streamed requests on the cache)
+        """
+        cached_model = self._get_cached_model()
+        if cached_model is not None:
+            try:
+                response = cached_model.generate_content(contents, **kwargs)
+                if kwargs.get("stream"):
+                    # An expired cache only surfaces once chunks are read, so streams are read here
+                    # where the inline fallback still applies
+                    response = list(response)
+                return response
+            except google_exceptions.ResourceExhausted:
+                # Rate limiting says nothing about the cache, let the caller back off
+                raise
+            except Exception as e:
+                # Most likely an expired cache - recreate it on the next call
+                logger.warning(f"Cached request failed, retrying with inline instructions: {e}")
+                with self._lock:
+                    if self._cached_model is cached_model:
+                        self._cached_model = None
+        
+        return self.inline_model.generate_content(contents, **kwargs)
+    
+    def delete(self):
+        """Delete the cached content if this instance created it, a reused cache is left to expire"""
+        with self._lock:
+            cached_content = self._cached_content if self._owns_cache else None
+            self._cached_content = None
+            self._cached_model = None
+            self._owns_cache = False
+        
+        if cached_content is not None:
+            try:
+                cached_content.delete()
+            except Exception as e:
+                logger.warning(f"Failed to delete context cache: {e}")
@@ -0,0 +1,108 @@
+"""
+Disk Cache for Gemini Results
+Persists results as JSON files keyed by a hash of everything that went into the request
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to stdlib json
+    orjson = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Part of every cache key; bump it when prompts or result formats change to invalidate old entries
+CACHE_VERSION = "v1"
+
+
+def make_cache_key(*parts: Union[str, bytes]) -> str:
+    """
+    Build a cache key from request inputs
+    
+    Args:
+        *parts: Model names, prompts, content digests or raw bytes identifying the request
+        
+    Returns:
+        Hex digest usable as a file name
+    """
+    digest = hashlib.blake2b(CACHE_VERSION.encode("utf-8"), digest_size=20)
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # Length prefix keeps ("ab", "c") and ("a", "bc") apart
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """JSON file cache for results that are expensive to recompute"""
+    
+    def __init__(self, cache_dir: str):
+        """
+        Initialize disk cache
+        
+        Args:
+            cache_dir: Directory holding the cached results
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def path_for(self, key: str) -> Path:
+        """
+        Get the file that holds a cache entry
+        
+        Args:
+            key: Cache key from make_cache_key
+            
+        Returns:
+            Path of the entry's JSON file (which may not exist yet)
+        """
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Load a cached result
+        
+        Args:
+            key: Cache key from make_cache_key
+            
+        Returns:
+            Cached value, or None on a miss or unreadable entry
+        """
+        cache_file = self.path_for(key)
+        try:
+            data = cache_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        
+        try:
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt cache entry {cache_file.name}: {e}")
+            return None
+    
+    def set(self, key: str, value: Any):
+        """
+        Store a result, replacing the file atomically
+        
+        Args:
+            key: Cache key from make_cache_key
+            value: JSON-serializable result
+        """
+        cache_file = self.path_for(key)
+        tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+        try:
+            if orjson is not None:
+                tmp_file.write_bytes(orjson.dumps(value))
+            else:
+                tmp_file.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+            tmp_file.replace(cache_file)
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry {cache_file.name}: {e}")
@@ -9,7 +9,12 @@ from typing import Dict, List, Any, Optional
 from pathlib import Path
 from datetime import datetime
 
-from voice_registry import VoiceRegistry
+from voice_registry import VoiceRegistry, get_default_registry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to stdlib json
+    orjson = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -25,15 +30,19 @@ class ElevenLabsJSONBuilder:
         
         Args:
             voice_registry: Voice registry instance for voice assignments
+                (defaults to the shared registry)
         """
-        self.voice_registry = voice_registry or VoiceRegistry()
+        self.voice_registry = voice_registry if voice_registry is not None else get_default_registry()
+        self._output_dirs: Dict[str, Path] = {}
         logger.info("ElevenLabs JSON Builder initialized")
     
     def build_eleven_json(self, 
                          page_data: Dict[str, Any], 
                          enhanced_dialogue: Dict[str, Any],
                          scene_title: str = None,
-                         add_narrator: bool = True) -> Dict[str, Any]:
+                         add_narrator: bool = True,
+                         voice_overrides: Dict[str, str] = None,
+                         page_number: Optional[int] = None) -> Dict[str, Any]:
         """
         Step 3: Build final ElevenLabs-ready JSON
         
@@ -42,33 +51,42 @@ class ElevenLabsJSONBuilder:
             enhanced_dialogue: Enhanced dialogue with audio tags
             scene_title: Optional scene title override
             add_narrator: Whether to add narrator dialogue
+            voice_overrides: Optional speaker to voice ID mapping that takes precedence over the registry
+            page_number: Page number stamped on each dialogue line (default: the page ID)
             
         Returns:
             ElevenLabs-ready JSON structure
         """
         try:
-            logger.info(f"Building ElevenLabs JSON for page: {page_data.get('page_id', 'unknown')}")
+            page_id = page_data.get("page_id", "unknown")
+            logger.info("Building ElevenLabs JSON for page: %s", page_id)
             
             # Extract basic data
-            page_id = page_data.get("page_id", "unknown")
             scene_description = page_data.get("scene", "No description available")
             ambient = page_data.get("ambient", "")
             characters = page_data.get("speaking_characters", [])
             dialogue_order = enhanced_dialogue.get("dialogue_order", [])
+            overrides = voice_overrides or {}
+            line_page = page_id if page_number is None else page_number
             
-            # Build characters dictionary with voice assignments
+            # Build characters dictionary with voice assignments; voice_ids maps each speaker
+            # straight to its voice so dialogue lines need a single lookup
             characters_dict = {}
+            voice_ids = {}
             for char in characters:
                 char_name = char["name"]
-                voice_id = self.voice_registry.assign_voice(char_name)
+                voice_id = overrides.get(char_name) or self.voice_registry.assign_voice(char_name)
+                voice_ids[char_name] = voice_id
                 characters_dict[char_name] = {
                     "voice_id": voice_id,
-                    "expression": char.get("expression", "neutral")
+                    # Models send null as well as leaving the field out
+                    "expression": char.get("expression") or "neutral"
                 }
             
             # Add narrator if requested
             if add_narrator:
-                narrator_voice = self.voice_registry.assign_voice("Narrator", character_type="narrator")
+                narrator_voice = overrides.get("Narrator") or self.voice_registry.assign_voice("Narrator", character_type="narrator")
+                voice_ids["Narrator"] = narrator_voice
                 characters_dict["Narrator"] = {
                     "voice_id": narrator_voice,
                     "expression": "neutral"
@@ -76,15 +94,15 @@ class ElevenLabsJSONBuilder:
             
             # Build dialogue list with voice assignments
             dialogue_list = []
+            dialogue_list_append = dialogue_list.append
             
             # Add scene description as narrator dialogue if add_narrator is True
-            if add_narrator and scene_description and "Narrator" in characters_dict:
-                narrator_voice_id = characters_dict["Narrator"]["voice_id"]
-                dialogue_list.append({
+            if add_narrator and scene_description:
+                dialogue_list_append({
                     "speaker": "Narrator",
-                    "voice_id": narrator_voice_id,
+                    "voice_id": voice_ids["Narrator"],
                     "text": f"[calm] {scene_description}",
-                    "page_number": page_data.get("page_id", "unknown"),
+                    "page_number": line_page,
                     "emotion": "neutral",
                     "confidence": "high"
                 })
@@ -95,23 +113,23 @@ class ElevenLabsJSONBuilder:
                 text = dialogue["text"]
                 
                 # Get voice assignment
-                if speaker in characters_dict:
-                    voice_id = characters_dict[speaker]["voice_id"]
-                else:
+                voice_id = voice_ids.get(speaker)
+                if voice_id is None:
                     # Assign voice for unknown character
-                    voice_id = self.voice_registry.assign_voice(speaker)
+                    voice_id = overrides.get(speaker) or self.voice_registry.assign_voice(speaker)
+                    voice_ids[speaker] = voice_id
                     characters_dict[speaker] = {
                         "voice_id": voice_id,
                         "expression": "neutral"
                     }
                 
-                dialogue_list.append({
+                dialogue_list_append({
                     "speaker": speaker,
                     "voice_id": voice_id,
                     "text": text,
-                    "page_number": page_data.get("page_id", "unknown"),
-                    "emotion": dialogue.get("emotion", "neutral"),
-                    "confidence": dialogue.get("confidence", "medium")
+                    "page_number": line_page,
+                    "emotion": dialogue.get("emotion") or "neutral",
+                    "confidence": dialogue.get("confidence") or "medium"
                 })
             
             # Build final JSON structure
@@ -129,7 +147,7 @@ class ElevenLabsJSONBuilder:
                 }
             }
             
-            logger.info(f"Built ElevenLabs JSON with {len(dialogue_list)} dialogue lines and {len(characters_dict)} characters")
+            logger.info("Built ElevenLabs JSON with %d dialogue lines and %d characters", len(dialogue_list), len(characters_dict))
             return eleven_json
             
         except Exception as e:
@@ -159,6 +177,23 @@ class ElevenLabsJSONBuilder:
         
         return title
     
+    def _ensure_output_dir(self, output_dir: str) -> Path:
+        """
+        Create an output directory once and reuse its Path on later saves
+        
+        Args:
+            output_dir: Output directory for JSON files
+            
+        Returns:
+            Path to the output directory
+        """
+        output_path = self._output_dirs.get(output_dir)
+        if output_path is None:
+            output_path = Path(output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
+            self._output_dirs[output_dir] = output_path
+        return output_path
+    
     def save_json(self, eleven_json: Dict[str, Any], output_dir: str = "scenes") -> str:
         """
         Save ElevenLabs JSON to file
@@ -171,15 +206,17 @@ class ElevenLabsJSONBuilder:
             Path to saved JSON file
         """
         try:
-            output_path = Path(output_dir)
-            output_path.mkdir(parents=True, exist_ok=True)
+            output_path = self._ensure_output_dir(output_dir)
             
             page_id = eleven_json.get("page_id", "unknown")
             json_filename = f"page_{page_id}.json"
             json_filepath = output_path / json_filename
             
-            with open(json_filepath, 'w', encoding='utf-8') as f:
-                json.dump(eleven_json, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                json_filepath.write_bytes(orjson.dumps(eleven_json, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_filepath, 'w', encoding='utf-8') as f:
+                    json.dump(eleven_json, f, indent=2, ensure_ascii=False)
             
             logger.info(f"ElevenLabs JSON saved to: {json_filepath}")
             return str(json_filepath)
@@ -188,6 +225,46 @@ class ElevenLabsJSONBuilder:
             logger.error(f"Error saving ElevenLabs JSON: {str(e)}")
             raise
     
+    def save_jsonl(self, eleven_json: Dict[str, Any], output_dir: str = "scenes") -> str:
+        """
+        Save ElevenLabs JSON as JSON-lines for streaming consumers
+        
+        The first line holds the page header (everything except dialogue),
+        each following line holds a single dialogue item.
+        
+        Args:
+            eleven_json: ElevenLabs JSON data
+            output_dir: Output directory for JSONL files
+            
+        Returns:
+            Path to saved JSONL file
+        """
+        try:
+            output_path = self._ensure_output_dir(output_dir)
+            
+            page_id = eleven_json.get("page_id", "unknown")
+            jsonl_filepath = output_path / f"page_{page_id}.jsonl"
+            
+            header = {key: value for key, value in eleven_json.items() if key != "dialogue"}
+            records = [header]
+            records.extend(eleven_json.get("dialogue", []))
+            
+            if orjson is not None:
+                lines = [orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records]
+            else:
+                lines = [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records]
+            
+            # Single write call for the whole file
+            with open(jsonl_filepath, 'wb') as f:
+                f.write(b"".join(lines))
+            
+            logger.info(f"ElevenLabs JSONL saved to: {jsonl_filepath}")
+            return str(jsonl_filepath)
+            
+        except Exception as e:
+            logger.error(f"Error saving ElevenLabs JSONL: {str(e)}")
+            raise
+    
     def validate_json(self, eleven_json: Dict[str, Any]) -> bool:
         """
         Validate ElevenLabs JSON structure
@@ -275,8 +352,11 @@ ElevenLabs JSON Summary:
         try:
             assignments = self.voice_registry.get_all_assignments()
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(assignments, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                Path(output_file).write_bytes(orjson.dumps(assignments, option=orjson.OPT_INDENT_2))
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(assignments, f, indent=2, ensure_ascii=False)
             
             logger.info(f"Voice assignments exported to: {output_file}")
         except Exception as e:
@@ -290,14 +370,14 @@ ElevenLabs JSON Summary:
             input_file: Path to voice assignments file
         """
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                assignments = json.load(f)
+            data = Path(input_file).read_bytes()
+            assignments = orjson.loads(data) if orjson is not None else json.loads(data)
             
-            # Update voice registry
-            for char_name, char_data in assignments.items():
-                voice_id = char_data.get("voice_id")
-                if voice_id:
-                    self.voice_registry.assign_voice(char_name, voice_id)
+            # Update voice registry in one pass
+            self.voice_registry.assign_voices({
+                char_name: char_data.get("voice_id")
+                for char_name, char_data in assignments.items()
+            })
             
             logger.info(f"Voice assignments loaded from: {input_file}")
         except Exception as e:
@@ -0,0 +1,107 @@
+"""
+Gemini Request Throttling
+Paces requests under request and token per-minute budgets and retries rate-limited calls with backoff
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+from google.api_core import exceptions as google_exceptions
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rate limiting (429) and an overloaded model (503), where sending more requests only makes it worse
+THROTTLING_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable)
+
+# Errors worth retrying with backoff: throttling and transient server failures (500, 504)
+# that usually succeed on the next attempt
+RETRYABLE_ERRORS = THROTTLING_ERRORS + (google_exceptions.InternalServerError, google_exceptions.DeadlineExceeded)
+
+# Gemini bills 258 tokens per 768x768 image tile; a page scaled to 1568px spans up to six tiles
+_IMAGE_TOKENS = 6 * 258
+
+
+def estimate_tokens(contents: Any) -> int:
+    """
+    Roughly estimate the input tokens of a Gemini request
+    
+    Args:
+        contents: Request contents (text, image parts or a list of them)
+        
+    Returns:
+        Estimated token count, erring on the high side for images
+    """
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return _IMAGE_TOKENS
+
+
+class RequestPacer:
+    """Spaces out requests across threads to stay under requests-per-minute and tokens-per-minute limits"""
+    
+    def __init__(self, requests_per_minute: Optional[int], tokens_per_minute: Optional[int] = None):
+        """
+        Initialize request pacer
+        
+        Args:
+            requests_per_minute: Maximum number of requests started per minute (None for no limit)
+            tokens_per_minute: Maximum number of input tokens sent per minute (None for no limit)
+        """
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.seconds_per_token = 60.0 / tokens_per_minute if tokens_per_minute else 0.0
+        self._next_slot = 0.0
+        self._next_token_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self, tokens: int = 0):
+        """
+        Block until the next request slot is available and the token budget covers the request
+        
+        Args:
+            tokens: Estimated input tokens of the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._next_token_slot)
+            self._next_slot = slot + self.interval
+            # Tokens refill continuously, so a large request pushes the following ones back proportionally
+            self._next_token_slot = slot + tokens * self.seconds_per_token
+        
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def call_with_retry(request: Callable[[], Any], max_retries: int, pacer: Optional[RequestPacer] = None,
+                    tokens: int = 0) -> Any:
+    """
+    Run a Gemini request, backing off and retrying when rate limited, overloaded or failing transiently
+    
+    Args:
+        request: Callable that performs the request
+        max_retries: Retries before the last error is raised
+        pacer: Optional pacer consulted before every attempt
+        tokens: Estimated input tokens of the request, charged to the pacer's token budget
+        
+    Returns:
+        Result of the request
+    """
+    for attempt in range(max_retries + 1):
+        if pacer is not None:
+            pacer.wait(tokens)
+        try:
+            return request()
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            # Jitter scales with the backoff, so workers throttled together do not all retry together
+            backoff = min(60.0, 2 ** attempt)
+            delay = backoff / 2 + random.uniform(0, backoff / 2)
+            logger.warning(f"Gemini request failed ({e.__class__.__name__}), retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
@@ -3,9 +3,15 @@ PDF Processing Module
 Handles PDF to image conversion and page extraction
 """
 
-import os
 import io
-from typing import List, Tuple
+import os
+import re
+import time
+import fnmatch
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 import fitz  # PyMuPDF
 from PIL import Image
 import logging
@@ -14,67 +20,320 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+def _natural_key(name: str) -> List[Any]:
+    """Sort key that orders embedded numbers numerically ("page_2" before "page_10")"""
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS_RE.split(name)]
+
+
+def find_files(directory: str, file_pattern: str) -> List[Path]:
+    """
+    List files in a directory matching a pattern, in natural reading order
+    
+    Args:
+        directory: Directory to search (not recursive)
+        file_pattern: Shell-style pattern such as "*.pdf", matched case-insensitively ("CH1.PDF" too)
+        
+    Returns:
+        Matching file paths sorted so that numbered chapters and pages stay in sequence
+    """
+    matcher = re.compile(fnmatch.translate(file_pattern), re.IGNORECASE)
+    # Names are matched before is_file, which scandir answers from the directory listing without a stat
+    with os.scandir(directory) as entries:
+        names = [entry.name for entry in entries if matcher.match(entry.name) and entry.is_file()]
+    names.sort(key=_natural_key)
+    base = Path(directory)
+    return [base / name for name in names]
+
+
+def _render_page_block(pdf_path: str, page_indices: List[int], dpi: int, image_paths: List[str],
+                       with_pixels: bool = True, jpeg_quality: int = 85,
+                       encode_format: str = None) -> List[Tuple[int, str, Tuple[int, int], bytes]]:
+    """
+    Render a block of PDF pages to raw pixels, opening the PDF once (runs in a worker process)
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_indices: Page indices to render (0-indexed)
+        dpi: Resolution for PDF to image conversion
+        image_paths: Optional path per page to save it, format taken from the extension (.png or .jpg)
+        with_pixels: Whether to return the pixels (False when only the saved files are needed)
+        jpeg_quality: Quality used when saving as JPEG
+        encode_format: Return pages encoded in this format (e.g. "png") instead of raw pixels,
+            and nothing for pages saved to disk, whose file can be read instead
+        
+    Returns:
+        Tuple of page index, PIL mode, size and pixel bytes per page (None pixels when with_pixels is False)
+    """
+    start = time.perf_counter()
+    pdf_document = fitz.open(pdf_path)
+    try:
+        mat = fitz.Matrix(dpi/72, dpi/72)  # 72 is default DPI
+        rendered = []
+        for page_idx, image_path in zip(page_indices, image_paths):
+            pix = pdf_document[page_idx].get_pixmap(matrix=mat)
+            
+            # Image encoding is only paid for when the page is written to disk
+            if image_path:
+                pix.save(image_path, jpg_quality=jpeg_quality)
+            
+            mode = "RGBA" if pix.alpha else "RGB"
+            if not with_pixels or (encode_format and image_path):
+                pixels = None
+            elif encode_format:
+                pixels = pix.tobytes(encode_format, jpg_quality=jpeg_quality)
+            else:
+                pixels = pix.samples
+            rendered.append((page_idx, mode, (pix.width, pix.height), pixels))
+            pix = None
+        
+        logger.debug("Rendered pages %d-%d in %.2fs", page_indices[0] + 1, page_indices[-1] + 1, time.perf_counter() - start)
+        return rendered
+    finally:
+        pdf_document.close()
+
+
+def _render_page(pdf_path: str, page_idx: int, dpi: int, image_path: str = None,
+                 with_pixels: bool = True, jpeg_quality: int = 85) -> Tuple[int, str, Tuple[int, int], bytes]:
+    """
+    Render a single PDF page to raw pixels
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_idx: Page index to render (0-indexed)
+        dpi: Resolution for PDF to image conversion
+        image_path: Optional path to save the page, format taken from the extension (.png or .jpg)
+        with_pixels: Whether to return the pixels (False when only the saved file is needed)
+        jpeg_quality: Quality used when saving as JPEG
+        
+    Returns:
+        Tuple of page index, PIL mode, size and raw pixel bytes (None pixels when with_pixels is False)
+    """
+    return _render_page_block(pdf_path, [page_idx], dpi, [image_path], with_pixels, jpeg_quality)[0]
+
 
 class PDFProcessor:
     """Handles PDF processing and page extraction"""
     
-    def __init__(self, dpi: int = 300):
+    def __init__(self, dpi: int = 300, max_workers: int = None, image_format: str = "png", jpeg_quality: int = 85,
+                 block_size: int = 1):
         """
         Initialize PDF processor
         
         Args:
             dpi: Resolution for PDF to image conversion
+            max_workers: Worker processes used for rasterization (default: CPU count)
+            image_format: Format of saved page images, "png" or "jpeg"
+            jpeg_quality: Quality of saved JPEG pages
+            block_size: Contiguous pages each rasterization task renders, opening the PDF once
         """
         self.dpi = dpi
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.image_extension = ".jpg" if image_format.lower() in ("jpeg", "jpg") else ".png"
+        self.jpeg_quality = jpeg_quality
+        self.block_size = max(1, block_size)
         
-    def extract_pages_as_images(self, pdf_path: str, output_dir: str = None) -> List[Image.Image]:
+    def iter_pages_as_images(self, pdf_path: str, output_dir: str = None,
+                             saved_paths: List[str] = None, pages: List[int] = None) -> Iterator[Image.Image]:
         """
-        Extract all pages from PDF as PIL Images
+        Lazily extract pages from PDF as PIL Images, one page at a time
+        
+        Only a bounded number of pages is rendered ahead of the consumer, so
+        memory use does not grow with the size of the PDF.
         
         Args:
             pdf_path: Path to the PDF file
             output_dir: Optional directory to save images
+            saved_paths: Optional list that receives the path of each page image as it is written
+            pages: Optional page indices (0-indexed) to render, default is every page
             
         Returns:
-            List of PIL Image objects
+            Iterator of PIL Image objects in page order
         """
         try:
             logger.info(f"Processing PDF: {pdf_path}")
             
-            # Open PDF with PyMuPDF
-            pdf_document = fitz.open(pdf_path)
-            images = []
-            
-            # Convert each page to image
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                # Convert page to image with specified DPI
-                mat = fitz.Matrix(self.dpi/72, self.dpi/72)  # 72 is default DPI
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Convert to PIL Image
-                image = Image.open(io.BytesIO(img_data))
-                images.append(image)
+            page_count = self.get_page_count(pdf_path)
+            page_indices = list(range(page_count)) if pages is None else list(pages)
+            image_paths = self._page_image_paths(pdf_path, output_dir, page_count)
             
-            pdf_document.close()
-            
-            logger.info(f"Successfully extracted {len(images)} pages")
+            for page_idx, image in self._render_pages(pdf_path, page_indices, image_paths, with_pixels=True):
+                if saved_paths is not None and image_paths[page_idx]:
+                    saved_paths.append(image_paths[page_idx])
+                yield image
             
-            # Save images if output directory is specified
+            logger.info(f"Successfully extracted {len(page_indices)} pages")
             if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-                pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+                logger.info(f"Saved {len(page_indices)} pages to {output_dir}")
+            
+        except Exception as e:
+            logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
+            raise
+    
+    def save_pages_as_images(self, pdf_path: str, output_dir: str) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily save pages from PDF as image files without building PIL Images
+        
+        Pixels never leave the rendering workers, so memory use stays flat
+        no matter how large the PDF is.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Directory to save images
+            
+        Returns:
+            Iterator of (page index, image path) tuples in page order
+        """
+        try:
+            logger.info(f"Saving pages of PDF: {pdf_path}")
+            
+            page_count = self.get_page_count(pdf_path)
+            image_paths = self._page_image_paths(pdf_path, output_dir, page_count)
+            
+            for page_idx, _ in self._render_pages(pdf_path, range(page_count), image_paths, with_pixels=False):
+                yield page_idx, image_paths[page_idx]
+            
+            logger.info(f"Saved {page_count} pages to {output_dir}")
+            
+        except Exception as e:
+            logger.error(f"Error saving pages of PDF {pdf_path}: {str(e)}")
+            raise
+    
+    def _page_image_paths(self, pdf_path: str, output_dir: str, page_count: int) -> List[str]:
+        """
+        Build the image path of every page, creating the output directory
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Optional directory to save images
+            page_count: Number of pages in the PDF
+            
+        Returns:
+            Path per page, or None per page when no output directory is given
+        """
+        if not output_dir:
+            return [None] * page_count
+        
+        os.makedirs(output_dir, exist_ok=True)
+        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        # Join the directory once, only the page number changes from path to path
+        prefix = os.path.join(output_dir, f"{pdf_name}_page_")
+        extension = self.image_extension
+        return [f"{prefix}{page_number}{extension}" for page_number in range(1, page_count + 1)]
+    
+    def _render_pages(self, pdf_path: str, page_indices: Iterable[int], image_paths: List[str],
+                      with_pixels: bool) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        Render pages in order, keeping a bounded number of pages in flight
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_indices: Page indices (0-indexed) to render
+            image_paths: Image path per page (None entries are not saved)
+            with_pixels: Whether rendered pages are returned to this process as PIL Images
+            
+        Returns:
+            Iterator of (page index, PIL Image or None when with_pixels is False) tuples
+        """
+        page_indices = list(page_indices)
+        # Short PDFs get smaller blocks, so every worker has a block to render
+        block_size = max(1, min(self.block_size, -(-len(page_indices) // self.max_workers)))
+        blocks = [page_indices[i:i + block_size] for i in range(0, len(page_indices), block_size)]
+        workers = min(self.max_workers, len(blocks))
+        # At least one block per worker so none sits idle, and about two pages per worker with small
+        # blocks. Finished pages come back encoded, so a block in flight holds megabytes, not raw pixmaps
+        max_in_flight = max(workers, workers * 2 // block_size)
+        
+        # Workers save the images themselves if output directory is specified
+        if workers <= 1:
+            for block in blocks:
+                for page_idx, mode, size, samples in _render_page_block(pdf_path, block, self.dpi,
+                                                                       [image_paths[i] for i in block],
+                                                                       with_pixels, self.jpeg_quality):
+                    yield page_idx, Image.frombytes(mode, size, samples) if with_pixels else None
+            return
+        
+        # Rasterize blocks in parallel, each worker opens the PDF once per block. Raw pixels of a
+        # 300 DPI page are tens of megabytes, more than the render costs to pipe back, so workers
+        # return pages as lossless PNG, or nothing for pages they saved, which are read back from disk
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            pending = iter(blocks)
+            next_block = next(pending, None)
+            while next_block is not None or in_flight:
+                while next_block is not None and len(in_flight) < max_in_flight:
+                    in_flight.append(executor.submit(_render_page_block, pdf_path, next_block, self.dpi,
+                                                     [image_paths[i] for i in next_block], with_pixels,
+                                                     self.jpeg_quality, "png"))
+                    next_block = next(pending, None)
                 
-                for i, image in enumerate(images):
-                    image_path = os.path.join(output_dir, f"{pdf_name}_page_{i+1}.png")
-                    image.save(image_path, "PNG")
-                    logger.info(f"Saved page {i+1} to {image_path}")
+                for page_idx, _, _, encoded in in_flight.popleft().result():
+                    if not with_pixels:
+                        yield page_idx, None
+                        continue
+                    if encoded is None:
+                        encoded = Path(image_paths[page_idx]).read_bytes()
+                    yield page_idx, Image.open(io.BytesIO(encoded))
+    
+    def extract_pages_as_images(self, pdf_path: str, output_dir: str = None) -> List[Image.Image]:
+        """
+        Extract all pages from PDF as PIL Images
+        
+        Every decoded page is held in memory at once; prefer iter_pages_as_images
+        or extract_pages_to_files for long PDFs.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Optional directory to save images
             
-            return images
+        Returns:
+            List of PIL Image objects
+        """
+        return list(self.iter_pages_as_images(pdf_path, output_dir))
+    
+    def extract_pages_to_files(self, pdf_path: str, output_dir: str) -> List[Path]:
+        """
+        Extract all pages from PDF straight to image files
+        
+        Use this instead of extract_pages_as_images when only the files are needed;
+        no decoded page is ever held in this process.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_dir: Directory to save images
             
+        Returns:
+            List of image paths in page order
+        """
+        return [Path(image_path) for _, image_path in self.save_pages_as_images(pdf_path, output_dir)]
+    
+    def classify_pages(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Inspect each page's content without rasterizing it
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            One dict per page with "has_images", "has_drawings" (vector artwork) and "text_length"
+        """
+        try:
+            pdf_document = fitz.open(pdf_path)
+            try:
+                return [
+                    {
+                        "has_images": bool(page.get_images(full=False)),
+                        "has_drawings": bool(page.get_drawings()),
+                        "text_length": len(page.get_text("text").strip())
+                    }
+                    for page in pdf_document
+                ]
+            finally:
+                pdf_document.close()
         except Exception as e:
-            logger.error(f"Error processing PDF {pdf_path}: {str(e)}")
+            logger.error(f"Error classifying pages of {pdf_path}: {str(e)}")
             raise
     
     def get_page_count(self, pdf_path: str) -> int:
@@ -110,13 +369,15 @@ class PDFProcessor:
         try:
             logger.info(f"Extracting page {page_number} from {pdf_path}")
             
-            # Convert specific page to image
-            images = convert_from_path(pdf_path, dpi=self.dpi, first_page=page_number, last_page=page_number)
-            
-            if not images:
+            if page_number < 1:
                 raise ValueError(f"Page {page_number} not found in PDF")
             
-            return images[0]
+            # Render straight from the document instead of opening it a second time just to count pages
+            try:
+                _, mode, size, samples = _render_page(pdf_path, page_number - 1, self.dpi)
+            except IndexError:
+                raise ValueError(f"Page {page_number} not found in PDF")
+            return Image.frombytes(mode, size, samples)
             
         except Exception as e:
             logger.error(f"Error extracting page {page_number} from {pdf_path}: {str(e)}")
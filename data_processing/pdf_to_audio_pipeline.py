@@ -4,22 +4,295 @@ Two-pass processing: First analyze all pages for character consistency, then pro
 """
 
 import os
+import asyncio
+import gc
+import sys
 import json
+import hashlib
 import logging
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from datetime import datetime
 
-from pdf_processor import PDFProcessor
-from two_pass_hybrid_analyzer import TwoPassHybridAnalyzer
+from pdf_processor import PDFProcessor, find_files
+from two_pass_hybrid_analyzer import TwoPassHybridAnalyzer, _FAILED_SCENE
 from character_consistency_manager import CharacterConsistencyManager
 from audio_tag_enhancer import AudioTagEnhancer
 from eleven_json_builder import ElevenLabsJSONBuilder
+from disk_cache import DiskCache, make_cache_key
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to stdlib json
+    orjson = None
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extensions PDFProcessor can save page images with
+_PAGE_IMAGE_EXTENSIONS = frozenset((".png", ".jpg", ".jpeg"))
+
+
+class _UnifiedJSONWriter:
+    """Streams the unified scene JSON to disk one page of dialogue at a time, on a background thread"""
+    
+    def __init__(self, output_file: Path, header: Dict[str, Any]):
+        """
+        Open the output file and write the scene header
+        
+        Args:
+            output_file: Final path of the unified JSON file
+            header: Scene-level fields written before the dialogue array
+        """
+        self.output_file = Path(output_file)
+        # Unique per writer, scenes of the same name can be written at the same time by threads or worker processes
+        fd, tmp_name = tempfile.mkstemp(dir=self.output_file.parent, prefix=f"{self.output_file.name}.", suffix=".tmp")
+        self._tmp_file = Path(tmp_name)
+        # mkstemp creates owner-only files, the unified JSON is read by the API and other users
+        os.chmod(tmp_name, 0o644)
+        # orjson produces bytes, so the file is binary and nothing is decoded or re-encoded on the way to disk
+        self._file = os.fdopen(fd, 'wb')
+        self._file.write(b"{\n")
+        for key, value in header.items():
+            self._file.write(b"  " + _dumps_compact(key) + b": " + _dumps_compact(value) + b",\n")
+        self._file.write(b'  "dialogue": [')
+        self.dialogue_count = 0
+        
+        # Pages are encoded and written by a dedicated thread so the page loop never waits on disk
+        self._queue: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue()
+        self._error: Optional[Exception] = None
+        self._finished = False
+        self._writer = threading.Thread(target=self._drain, name="unified-json-writer", daemon=True)
+        self._writer.start()
+    
+    def _drain(self):
+        """Write queued pages of dialogue until the close sentinel arrives"""
+        written = 0
+        while True:
+            dialogue_items = self._queue.get()
+            if dialogue_items is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                if dialogue_items:
+                    self._file.write((b",\n    " if written else b"\n    ")
+                                     + b",\n    ".join(_dumps_compact(item) for item in dialogue_items))
+                    written += len(dialogue_items)
+            except Exception as e:
+                self._error = e
+    
+    def write_dialogue(self, dialogue_items: List[Dict[str, Any]]):
+        """
+        Queue dialogue items to be appended to the dialogue array
+        
+        Args:
+            dialogue_items: Dialogue items for one page
+        """
+        self._queue.put(list(dialogue_items))
+        self.dialogue_count += len(dialogue_items)
+    
+    def close(self, trailer: Dict[str, Any]):
+        """
+        Wait for queued dialogue, write the remaining fields and move the file into place
+        
+        Args:
+            trailer: Scene-level fields written after the dialogue array
+        """
+        self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            self._file.close()
+            raise self._error
+        
+        self._file.write(b"\n  ]" if self.dialogue_count else b"]")
+        for key, value in trailer.items():
+            self._file.write(b",\n  " + _dumps_compact(key) + b": " + _dumps_compact(value))
+        self._file.write(b"\n}\n")
+        self._file.close()
+        self._tmp_file.replace(self.output_file)
+        self._finished = True
+    
+    def abort(self):
+        """Stop the writer thread and discard the partial file, unless the file was already moved into place"""
+        if self._finished:
+            return
+        self._finished = True
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        self._tmp_file.unlink(missing_ok=True)
+
+
+class _ProgressLog:
+    """SQLite log of processed PDFs so interrupted batch runs can resume"""
+    
+    def __init__(self, db_file: Path):
+        """
+        Open (or create) the progress database
+        
+        Args:
+            db_file: Path to the SQLite database
+        """
+        self._conn = sqlite3.connect(str(db_file), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "hash TEXT PRIMARY KEY, scene_id TEXT, summary_path TEXT, ts REAL)"
+        )
+    
+    def lookup(self, digest: str) -> Optional[str]:
+        """
+        Get the scene summary path recorded for a PDF
+        
+        Args:
+            digest: Content hash of the PDF combined with the pipeline configuration
+            
+        Returns:
+            Summary file path, or None if the PDF has not been processed
+        """
+        row = self._conn.execute("SELECT summary_path FROM processed WHERE hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+    
+    def record(self, digest: str, scene_id: str, summary_path: str):
+        """
+        Record a successfully processed PDF
+        
+        Args:
+            digest: Content hash of the PDF combined with the pipeline configuration
+            scene_id: Scene identifier
+            summary_path: Path to the saved scene summary
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO processed (hash, scene_id, summary_path, ts) VALUES (?, ?, ?, ?)",
+            (digest, scene_id, summary_path, time.time())
+        )
+    
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+
+def _file_digest(file_path: Path) -> str:
+    """
+    Hash a file's contents in chunks
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dumps_compact(data: Any) -> bytes:
+    """
+    Serialize a value as single-line JSON
+    
+    Args:
+        data: JSON-serializable data
+        
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _content_scene_id(pdf_path: Path, digest: str) -> str:
+    """
+    Derive a scene ID that follows the PDF's contents rather than just its name
+    
+    Args:
+        pdf_path: Path to the PDF file
+        digest: Content digest from _file_digest
+        
+    Returns:
+        Scene identifier
+    """
+    return f"{pdf_path.stem}_{digest[:12]}"
+
+
+def _blank_page_analysis(page_number: int) -> Dict[str, Any]:
+    """
+    Build the analysis used for pages that were not sent to Gemini
+    
+    Args:
+        page_number: Page number
+        
+    Returns:
+        Empty page analysis
+    """
+    return {
+        "page_number": page_number,
+        # An empty scene, so no narrator line is read out for the page
+        "scene": "",
+        "speaking_characters": [],
+        "dialogue_order": [],
+        "ambient": ""
+    }
+
+
+def _restore_skipped_pages(scene_analysis: Dict[str, Any], content_pages: List[int], total_pages: int):
+    """
+    Put pages that were not analyzed back into a scene analysis, renumbering everything to PDF page numbers
+    
+    Args:
+        scene_analysis: Analysis of the content pages only, updated in place
+        content_pages: PDF page indices (0-indexed) that were analyzed, in order
+        total_pages: Number of pages in the PDF
+    """
+    analyses = dict(zip(content_pages, scene_analysis["page_analyses"]))
+    scene_analysis["page_analyses"] = [analyses.get(i) or _blank_page_analysis(i + 1) for i in range(total_pages)]
+    for page_number, page_analysis in enumerate(scene_analysis["page_analyses"], 1):
+        page_analysis["page_number"] = page_number
+    scene_analysis["total_pages"] = total_pages
+    
+    # Pass 1 numbered pages 1..len(content_pages); map them back to the PDF's page numbers
+    def pdf_page_numbers(pages: List[Any]) -> List[Any]:
+        return [content_pages[page - 1] + 1 if isinstance(page, int) and 1 <= page <= len(content_pages) else page
+                for page in pages]
+    
+    identified = scene_analysis.get("character_context", {}).get("character_identification", {})
+    for char in identified.get("characters", []):
+        if char.get("appears_in_pages"):
+            char["appears_in_pages"] = pdf_page_numbers(char["appears_in_pages"])
+    # Importance stays as judged on the analyzed pages, the percentage is reported against the whole PDF
+    for consistency in scene_analysis.get("characters", {}).get("consistency", {}).values():
+        consistency["pages_appeared"] = pdf_page_numbers(consistency.get("pages_appeared", []))
+        consistency["appearance_percentage"] = round(100.0 * consistency.get("appearance_count", 0) / total_pages, 1)
+
+
+def _write_json_file(file_path: Path, data: Any):
+    """
+    Write a JSON file atomically so readers never see a partial file
+    
+    Args:
+        file_path: Destination path
+        data: JSON-serializable data
+    """
+    tmp_file = file_path.with_name(file_path.name + ".tmp")
+    if orjson is not None:
+        tmp_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str))
+    else:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    tmp_file.replace(file_path)
+
 
 class PDFToAudioPipeline:
     """Complete pipeline for converting PDF manga to ElevenLabs-ready audio JSON"""
@@ -30,7 +303,19 @@ class PDFToAudioPipeline:
                  vision_model: str = "gemini-2.0-flash",
                  enhancement_model: str = "gemini-2.5-flash-lite",
                  pdf_dpi: int = 300,
-                 batch_size: int = 5):
+                 batch_size: int = 5,
+                 pdf_workers: int = None,
+                 use_result_cache: bool = True,
+                 batch_pages: int = 4,
+                 requests_per_minute: int = None,
+                 image_format: str = "jpeg",
+                 jpeg_quality: int = 85,
+                 pdf_block_size: int = 4,
+                 upload_format: str = "jpeg",
+                 tokens_per_minute: int = None,
+                 use_batch_api: bool = False,
+                 batch_api_timeout: float = 1800.0,
+                 skip_blank_pages: bool = False):
         """
         Initialize the complete PDF-to-audio pipeline
         
@@ -41,18 +326,70 @@ class PDFToAudioPipeline:
             enhancement_model: Gemini model for audio tag enhancement
             pdf_dpi: DPI for PDF to image conversion
             batch_size: Number of dialogue lines to process per API call (default: 5)
+            pdf_workers: Processes used to rasterize PDF pages (default: CPU count - 1)
+            use_result_cache: Cache Gemini results under output_dir/_cache so reruns skip unchanged scenes
+            batch_pages: Pages sent together in one Gemini dialogue-extraction request
+            requests_per_minute: Optional Gemini request budget per model, split across worker processes
+            image_format: Format of extracted page images, "jpeg" or "png"
+            jpeg_quality: JPEG quality for extracted pages and images sent to Gemini
+            pdf_block_size: Contiguous pages each rasterization process renders per task
+            upload_format: Lossy format of page images sent to Gemini, "jpeg" or "webp"
+            tokens_per_minute: Optional Gemini input token budget per model, split across worker processes
+            use_batch_api: Run dialogue extraction through the half-price Gemini Batch API (slower, needs google-genai)
+            batch_api_timeout: Seconds a scene waits for its batch jobs before falling back to real-time requests
+            skip_blank_pages: Leave pages with no images, vector drawings or text out of rasterization and analysis
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.batch_size = batch_size
         
+        # Constructor arguments, used to rebuild the pipeline inside worker processes
+        self._worker_config = {
+            "output_dir": output_dir,
+            "gemini_api_key": gemini_api_key,
+            "vision_model": vision_model,
+            "enhancement_model": enhancement_model,
+            "pdf_dpi": pdf_dpi,
+            "batch_size": batch_size,
+            "pdf_workers": pdf_workers,
+            "use_result_cache": use_result_cache,
+            "batch_pages": batch_pages,
+            "requests_per_minute": requests_per_minute,
+            "image_format": image_format,
+            "jpeg_quality": jpeg_quality,
+            "pdf_block_size": pdf_block_size,
+            "upload_format": upload_format,
+            "tokens_per_minute": tokens_per_minute,
+            "use_batch_api": use_batch_api,
+            "batch_api_timeout": batch_api_timeout,
+            "skip_blank_pages": skip_blank_pages
+        }
+        
+        # Background writer for result files that nothing downstream waits on
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline-io")
+        self._pending_writes: List[Future] = []
+        
         # Initialize components
-        self.pdf_processor = PDFProcessor(dpi=pdf_dpi)
+        # Leave a core for encoding and uploading pages while the rest rasterize
+        if pdf_workers is None:
+            pdf_workers = max(1, (os.cpu_count() or 1) - 1)
+        self.pdf_processor = PDFProcessor(dpi=pdf_dpi, max_workers=pdf_workers, image_format=image_format,
+                                          jpeg_quality=jpeg_quality, block_size=pdf_block_size)
+        cache_dir = str(self.output_dir / "_cache") if use_result_cache else None
+        # Whole-PDF analyses, so a rerun on an unchanged PDF skips rasterization as well
+        self._result_cache = DiskCache(cache_dir) if cache_dir else None
         # Use optimized models: fast Flash for Pass 1, powerful Pro for Pass 2
-        self.scene_analyzer = TwoPassHybridAnalyzer(gemini_api_key, "gemini-2.0-flash", "gemini-2.5-pro")
+        self.scene_analyzer = TwoPassHybridAnalyzer(gemini_api_key, "gemini-2.0-flash", "gemini-2.5-pro",
+                                                    pages_per_request=batch_pages, cache_dir=cache_dir,
+                                                    requests_per_minute=requests_per_minute, jpeg_quality=jpeg_quality,
+                                                    image_format=upload_format, tokens_per_minute=tokens_per_minute,
+                                                    use_batch_api=use_batch_api, batch_api_timeout=batch_api_timeout)
         self.consistency_manager = CharacterConsistencyManager()
-        self.audio_enhancer = AudioTagEnhancer(gemini_api_key, enhancement_model)
+        self.audio_enhancer = AudioTagEnhancer(gemini_api_key, enhancement_model, cache_dir=cache_dir,
+                                               requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
         self.json_builder = ElevenLabsJSONBuilder(self.consistency_manager.voice_registry)
+        self.vision_model_name = self.scene_analyzer.pass2_model_name
+        self.enhancement_model_name = enhancement_model
         
         logger.info("PDF-to-Audio Pipeline initialized")
     
@@ -61,28 +398,41 @@ class PDFToAudioPipeline:
                          scene_id: str = None,
                          extract_images: bool = True,
                          cleanup_images: bool = True,
-                         image_output_dir: str = None) -> Dict[str, Any]:
+                         image_output_dir: str = None,
+                         include_statistics: bool = True,
+                         return_audio_json: bool = False,
+                         _defer_writes: bool = False) -> Dict[str, Any]:
         """
         Process a complete PDF scene through two-pass analysis
         
         Args:
             pdf_path: Path to PDF file
-            scene_id: Optional scene identifier
+            scene_id: Optional scene identifier (default: file name plus a content hash)
             extract_images: Whether to extract and save page images
             cleanup_images: Whether to clean up extracted images after processing
-            image_output_dir: Directory for extracted images
+            image_output_dir: Directory for extracted images (default: a temporary directory when they
+                are cleaned up, otherwise <scene_id>_images in the output directory)
+            include_statistics: Add registry-wide character statistics to the results
+            return_audio_json: Also return the unified JSON under "audio_json", so callers
+                do not have to read it back from disk
+            _defer_writes: Leave the scene summary writing in the background (process_multiple_pdfs
+                waits for it with flush_writes); by default it is on disk when this returns
             
         Returns:
             Complete processing results
         """
+        temp_image_dir = None
+        unified_writer = None
         try:
             pdf_path = Path(pdf_path)
             if not pdf_path.exists():
                 raise FileNotFoundError(f"PDF file not found: {pdf_path}")
             
-            # Generate scene ID if not provided
+            # Generate scene ID if not provided; the content hash keeps edited PDFs from reusing stale outputs
+            pdf_digest = None
             if not scene_id:
-                scene_id = pdf_path.stem
+                pdf_digest = _file_digest(pdf_path)
+                scene_id = _content_scene_id(pdf_path, pdf_digest)
             
             logger.info(f"Starting PDF-to-Audio processing for: {pdf_path.name}")
             logger.info(f"Scene ID: {scene_id}")
@@ -91,171 +441,213 @@ class PDFToAudioPipeline:
             logger.info("Step 1: Extracting PDF pages as images...")
             if image_output_dir:
                 image_dir = Path(image_output_dir)
+            elif extract_images and cleanup_images:
+                # Images that are deleted right after the scene never need to reach the disk, keep them in RAM
+                temp_image_dir = tempfile.mkdtemp(prefix=f"{scene_id}_images_",
+                                                  dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+                image_dir = Path(temp_image_dir)
             else:
                 image_dir = self.output_dir / f"{scene_id}_images"
             
-            images = self.pdf_processor.extract_pages_as_images(str(pdf_path), str(image_dir))
-            image_paths = [str(image_dir / f"{pdf_path.stem}_page_{i+1}.png") for i in range(len(images))]
+            image_paths: List[str] = []
+            scene_analysis = None
             
-            logger.info(f"Extracted {len(images)} pages as images")
+            # Page images the caller keeps can only come from rasterizing, so only cache when they are not kept
+            cache_key = None
+            if self._result_cache is not None and not (extract_images and not cleanup_images):
+                if pdf_digest is None:
+                    pdf_digest = _file_digest(pdf_path)
+                cache_key = make_cache_key("pdf_scene_analysis", pdf_digest, self.scene_analyzer.analysis_config_digest,
+                                           str(self._worker_config["pdf_dpi"]), str(self._worker_config["skip_blank_pages"]))
+                scene_analysis = self._result_cache.get(cache_key)
+                if scene_analysis is not None:
+                    logger.info(f"Reusing cached analysis of {pdf_path.name}, skipping rasterization")
+                    scene_analysis["scene_id"] = scene_id
             
-            # Step 2: Two-pass hybrid scene analysis (character identification + individual dialogue)
-            logger.info("Step 2: Two-pass hybrid scene analysis (character identification + individual dialogue)...")
-            scene_analysis = self.scene_analyzer.analyze_scene_characters(image_paths, scene_id)
+            if scene_analysis is None:
+                scene_analysis = self._rasterize_and_analyze(pdf_path, scene_id, image_dir if extract_images else None,
+                                                             image_paths)
+                # The analyzer only hands back a cache file for analyses where every page succeeded
+                if cache_key is not None and scene_analysis.get("analysis_file"):
+                    self._result_cache.set(cache_key, scene_analysis)
+            page_count = len(scene_analysis["page_analyses"])
             
-            logger.info(self.scene_analyzer.get_character_summary(scene_analysis))
+            logger.info(f"Extracted and analyzed {page_count} pages")
             
-            # Step 3: Register characters and assign consistent voices
-            logger.info("Step 3: Registering characters and assigning consistent voices...")
-            voice_assignments = self.consistency_manager.register_scene_characters(scene_id, scene_analysis)
+            # Building the summary walks every page, skip it when INFO records are dropped
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(self.scene_analyzer.get_character_summary(scene_analysis))
             
-            logger.info(f"Assigned voices to {len(voice_assignments)} characters")
+            # Step 3: Collect ALL dialogue from all pages for enhancement
+            logger.info("Step 3: Collecting all dialogue for enhancement...")
+            # Annotated copies, so the page analyses (and anything cached from them) are left untouched
+            all_dialogue_data = [
+                {**dialogue_item, "page_number": page_number, "original_page_index": index}
+                for index, (page_number, dialogue_item) in enumerate(
+                    (page_number, dialogue_item)
+                    for page_number, page_analysis in enumerate(scene_analysis["page_analyses"], 1)
+                    for dialogue_item in page_analysis.get("dialogue_order", [])
+                )
+            ]
             
-            # Step 4: Collect ALL dialogue from all pages for single enhancement call
-            logger.info("Step 4: Collecting all dialogue for single enhancement call...")
-            all_dialogue_data = []
-            page_dialogue_mapping = {}  # Track which dialogue belongs to which page
+            logger.info(f"Collected {len(all_dialogue_data)} dialogue lines from all pages")
             
-            for i, page_analysis in enumerate(scene_analysis["page_analyses"]):
-                page_number = i + 1
-                dialogue_order = page_analysis.get("dialogue_order", [])
+            # Enhancement does not depend on voices, so the API call runs while voices are assigned
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="enhance") as enhance_pool:
+                enhancement = enhance_pool.submit(self.audio_enhancer.enhance_all_dialogue_parallel, all_dialogue_data)
+                
+                # Step 4: Register characters and assign consistent voices
+                logger.info("Step 4: Registering characters and assigning consistent voices...")
+                voice_assignments = self.consistency_manager.register_scene_characters(scene_id, scene_analysis)
+                
+                logger.info(f"Assigned voices to {len(voice_assignments)} characters")
+                
+                # Register every speaker up front with a single registry save, so building a page only
+                # reads voice assignments instead of writing the registry for each new speaker
+                scene_speakers = {"Narrator"}
+                for page_analysis in scene_analysis["page_analyses"]:
+                    scene_speakers.update(char.get("name") for char in page_analysis.get("speaking_characters", []))
+                    scene_speakers.update(item.get("speaker") for item in page_analysis.get("dialogue_order", []))
+                self.json_builder.voice_registry.assign_missing_voices(scene_speakers)
                 
-                # Add page number to each dialogue item and collect
-                for dialogue_item in dialogue_order:
-                    dialogue_item["page_number"] = page_number
-                    dialogue_item["original_page_index"] = len(all_dialogue_data)
-                    all_dialogue_data.append(dialogue_item)
-                    page_dialogue_mapping[len(all_dialogue_data) - 1] = page_number
+                # Step 5: Enhancement of ALL dialogue (long scenes are split into parallel calls)
+                logger.info("Step 5: Waiting for dialogue enhancement...")
+                enhanced_all_dialogue = enhancement.result()
             
-            logger.info(f"Collected {len(all_dialogue_data)} dialogue lines from all pages")
+            # The enhancer hands back the original items, not tagged copies, for lines it could not enhance
+            unenhanced_lines = sum(dialogue_item is enhanced_item
+                                   for dialogue_item, enhanced_item in zip(all_dialogue_data, enhanced_all_dialogue))
+            if unenhanced_lines:
+                logger.warning(f"{unenhanced_lines} dialogue lines were left without audio tags")
             
-            # Step 5: Single enhancement call for ALL dialogue
-            logger.info("Step 5: Enhancing ALL dialogue with single API call...")
-            enhanced_all_dialogue = self.audio_enhancer.enhance_all_dialogue_at_once(all_dialogue_data)
+            # Bucket enhanced dialogue by page in a single pass (enhancement keeps the input order)
+            page_buckets = [[] for _ in range(page_count)]
+            for dialogue_item, enhanced_item in zip(all_dialogue_data, enhanced_all_dialogue):
+                page_buckets[dialogue_item["page_number"] - 1].append(enhanced_item)
             
             # Step 6: Distribute enhanced dialogue back to pages and build JSON
             logger.info("Step 6: Building ElevenLabs JSON for each page...")
-            all_dialogue = []
+            
+            # Dialogue is streamed into the unified JSON as each page is built
+            main_characters = scene_analysis['scene_summary'].get('main_characters', [])
+            unified_output_file = self.output_dir / "page_unknown.json"
+            unified_header = {
+                "scene_id": scene_id,
+                "scene_title": f"{main_characters[0]} - Complete Scene" if main_characters else "Complete Scene",
+                "ambient": scene_analysis.get("ambient_context", "")
+            }
+            unified_writer = _UnifiedJSONWriter(unified_output_file, unified_header)
+            # Only kept in memory when the caller wants the unified JSON back
+            audio_dialogue = [] if return_audio_json else None
             all_characters = {}
             successful_pages = 0
             failed_pages = 0
             
-            for i, page_analysis in enumerate(scene_analysis["page_analyses"]):
-                page_number = i + 1
-                
-                logger.info(f"Processing page {page_number}/{len(image_paths)}")
+            # Bound once instead of being looked up again for every page
+            build_eleven_json = self.json_builder.build_eleven_json
+            write_dialogue = unified_writer.write_dialogue
+            title_prefix = f"{main_characters[0]} - " if main_characters else ""
+            
+            for page_number, (page_analysis, page_dialogue) in enumerate(zip(scene_analysis["page_analyses"], page_buckets), 1):
+                logger.info("Processing page %d/%d", page_number, page_count)
                 
                 try:
-                    # Extract dialogue for this page from enhanced results
-                    page_dialogue = []
-                    for j, dialogue_item in enumerate(all_dialogue_data):
-                        if page_dialogue_mapping.get(j) == page_number:
-                            # Find the enhanced version
-                            enhanced_item = enhanced_all_dialogue[j]
-                            page_dialogue.append(enhanced_item)
-                    
                     # Create enhanced dialogue structure for this page
                     enhanced_dialogue = {
                         "dialogue_order": page_dialogue
                     }
                     
                     # Build ElevenLabs JSON with consistent voice assignments and page numbers
-                    page_id = f"{scene_id}_p{page_number:02d}"
-                    main_characters = scene_analysis['scene_summary'].get('main_characters', [])
-                    scene_title = f"{main_characters[0]} - Page {page_number}" if main_characters else f"Page {page_number}"
-                    eleven_json = self.json_builder.build_eleven_json(
+                    eleven_json = build_eleven_json(
                         page_analysis,  # Use the comprehensive analysis from Step 2
                         enhanced_dialogue,
-                        scene_title=scene_title,
-                        add_narrator=True
+                        scene_title=f"{title_prefix}Page {page_number}",
+                        add_narrator=True,
+                        voice_overrides=voice_assignments,  # Scene-level consistent voices
+                        page_number=page_number
                     )
                     
-                    # Override voice assignments with scene-level consistency
-                    for dialogue_item in eleven_json["dialogue"]:
-                        char_name = dialogue_item["speaker"]
-                        if char_name in voice_assignments:
-                            dialogue_item["voice_id"] = voice_assignments[char_name]
-                        # Add page number to each dialogue item
-                        dialogue_item["page_number"] = page_number
-                    
-                    # Update characters dictionary with consistent voices
-                    if "characters" in eleven_json:
-                        for char_name, voice_id in voice_assignments.items():
-                            if char_name in eleven_json["characters"]:
-                                eleven_json["characters"][char_name]["voice_id"] = voice_id
+                    page_items = eleven_json.get("dialogue")
+                    if page_items:
+                        write_dialogue(page_items)
+                        if audio_dialogue is not None:
+                            audio_dialogue.extend(page_items)
                     
-                    # Accumulate dialogue and characters
-                    if "dialogue" in eleven_json and eleven_json["dialogue"]:
-                        all_dialogue.extend(eleven_json["dialogue"])
-                    if "characters" in eleven_json and eleven_json["characters"]:
-                        all_characters.update(eleven_json["characters"])
+                    # Accumulate characters
+                    page_characters = eleven_json.get("characters")
+                    if page_characters:
+                        all_characters.update(page_characters)
                     
                     successful_pages += 1
-                    logger.info(f"✓ Page {page_number} processed successfully")
+                    logger.info("✓ Page %d processed successfully", page_number)
                     
                 except Exception as e:
-                    logger.error(f"✗ Error processing page {page_number}: {str(e)}")
-                    import traceback
-                    logger.error(f"Full traceback: {traceback.format_exc()}")
+                    logger.error("✗ Error processing page %d: %s: %s", page_number, type(e).__name__, e)
+                    # Tracebacks are only formatted when debugging, a rate-limit storm would otherwise flood the log
+                    logger.debug("Traceback for page %d", page_number, exc_info=True)
                     failed_pages += 1
             
-            # Step 7: Create single JSON file with all dialogue
-            logger.info("Step 7: Creating unified JSON with all pages...")
+            # Step 7: Finish the single JSON file with all dialogue
+            logger.info("Step 7: Finishing unified JSON with all pages...")
             
-            # Create final unified JSON
-            main_characters = scene_analysis['scene_summary'].get('main_characters', [])
-            scene_title = f"{main_characters[0]} - Complete Scene" if main_characters else "Complete Scene"
-            
-            unified_json = {
-                "scene_id": scene_id,
-                "scene_title": scene_title,
-                "ambient": scene_analysis.get("ambient_context", ""),
+            total_dialogue_lines = unified_writer.dialogue_count
+            # The unified JSON and the scene results report the same moment and counts, build them once
+            generated_at = datetime.now().isoformat()
+            scene_counts = {
+                "total_pages": page_count,
+                "successful_pages": successful_pages,
+                "failed_pages": failed_pages,
+                "total_dialogue_lines": total_dialogue_lines,
+                "total_characters": len(all_characters)
+            }
+            unified_trailer = {
                 "characters": all_characters,
-                "dialogue": all_dialogue,
                 "metadata": {
-                    "generated_at": datetime.now().isoformat(),
-                    "total_pages": len(image_paths),
-                    "successful_pages": successful_pages,
-                    "failed_pages": failed_pages,
-                    "total_dialogue_lines": len(all_dialogue),
-                    "total_characters": len(all_characters),
+                    "generated_at": generated_at,
+                    **scene_counts,
                     "pdf_file": str(pdf_path)
                 }
             }
-            
-            # Save unified JSON
-            unified_output_file = self.output_dir / "page_unknown.json"
-            with open(unified_output_file, 'w', encoding='utf-8') as f:
-                json.dump(unified_json, f, indent=2, ensure_ascii=False)
+            unified_writer.close(unified_trailer)
             
             logger.info(f"✓ Unified JSON saved to: {unified_output_file}")
             
             # Step 8: Clean up extracted page images (optional)
             if extract_images and cleanup_images:
                 logger.info("Step 8: Cleaning up extracted page images...")
-                self._cleanup_page_images(image_dir)
+                # The default image directory belongs to this scene alone, so it can go as a whole
+                self._cleanup_page_images(image_dir, image_paths, remove_directory=not image_output_dir)
             
             # Step 9: Compile final results
             
             final_results = {
                 "scene_id": scene_id,
                 "pdf_file": str(pdf_path),
-                "processing_timestamp": datetime.now().isoformat(),
-                "total_pages": len(image_paths),
-                "successful_pages": successful_pages,
-                "failed_pages": failed_pages,
-                "total_dialogue_lines": len(all_dialogue),
-                "total_characters": len(all_characters),
+                "processing_timestamp": generated_at,
+                **scene_counts,
                 "voice_assignments": voice_assignments,
-                "character_statistics": self.consistency_manager.get_character_statistics(),
                 "output_directory": str(self.output_dir),
-                "unified_json_file": str(unified_output_file)
+                "unified_json_file": str(unified_output_file),
+                # Whether every page was analyzed, enhanced and built; only such scenes are skipped on resume
+                "fully_processed": (failed_pages == 0 and not unenhanced_lines
+                                    and not any(page.get("scene") == _FAILED_SCENE
+                                                for page in scene_analysis["page_analyses"]))
             }
             
-            # Save scene summary
+            # Statistics cover the whole registry, batches ask for them once via get_pipeline_status instead
+            if include_statistics:
+                final_results["character_statistics"] = self.consistency_manager.get_character_statistics()
+            
+            # The full analysis is already on disk in the result cache; reference it rather than copy it
+            if scene_analysis.get("analysis_file"):
+                final_results["scene_analysis"] = {"ref": scene_analysis["analysis_file"]}
+            
+            # Save scene summary in the background, batches start the next scene right away
+            # while single calls wait for it because callers read the output directory next
             scene_summary_file = self.output_dir / f"{scene_id}_scene_summary.json"
-            with open(scene_summary_file, 'w', encoding='utf-8') as f:
-                json.dump(final_results, f, indent=2, ensure_ascii=False)
+            self._pending_writes.append(self._io_pool.submit(_write_json_file, scene_summary_file, final_results))
+            if not _defer_writes:
+                self.flush_writes()
             
             logger.info(f"Scene processing complete!")
             logger.info(f"✓ Successful pages: {successful_pages}")
@@ -263,37 +655,125 @@ class PDFToAudioPipeline:
             logger.info(f"📁 Output saved to: {self.output_dir}")
             logger.info(f"📄 Unified JSON: {unified_output_file}")
             
+            if audio_dialogue is not None:
+                # A new dict, the summary written in the background must not pick up the whole JSON
+                return {**final_results, "audio_json": {**unified_header, "dialogue": audio_dialogue, **unified_trailer}}
             return final_results
             
         except Exception as e:
             logger.error(f"Error processing PDF scene: {str(e)}")
+            if unified_writer is not None:
+                unified_writer.abort()
+            if temp_image_dir is not None:
+                shutil.rmtree(temp_image_dir, ignore_errors=True)
             raise
     
-    def _cleanup_page_images(self, image_dir: Path):
+    def _rasterize_and_analyze(self, pdf_path: Path, scene_id: str, image_dir: Optional[Path],
+                               image_paths: List[str]) -> Dict[str, Any]:
+        """
+        Rasterize the PDF and run the two-pass scene analysis on its pages
+        
+        Args:
+            pdf_path: Path to PDF file
+            scene_id: Scene identifier
+            image_dir: Directory to save page images in, or None to keep them in memory only
+            image_paths: List that receives the paths of saved page images
+            
+        Returns:
+            Scene analysis with one page analysis per PDF page
+        """
+        # Optionally leave out pages with nothing on them at all, so they are neither rasterized nor analyzed
+        if self._worker_config["skip_blank_pages"]:
+            page_kinds = self.pdf_processor.classify_pages(str(pdf_path))
+            total_pages = len(page_kinds)
+            content_pages = [i for i, kind in enumerate(page_kinds)
+                             if kind["has_images"] or kind["has_drawings"] or kind["text_length"]]
+            if not content_pages:
+                content_pages = list(range(total_pages))
+            elif len(content_pages) < total_pages:
+                logger.info(f"Skipping {total_pages - len(content_pages)} blank pages")
+        else:
+            total_pages = None
+            content_pages = None
+        
+        # Pages stream straight into the analyzer, page images are only written when image_dir is set
+        page_images = self.pdf_processor.iter_pages_as_images(str(pdf_path), str(image_dir) if image_dir else None,
+                                                              saved_paths=image_paths, pages=content_pages)
+        
+        # Step 2: Two-pass hybrid scene analysis (character identification + individual dialogue)
+        logger.info("Step 2: Two-pass hybrid scene analysis (character identification + individual dialogue)...")
+        scene_analysis = self.scene_analyzer.analyze_scene_characters(page_images, scene_id)
+        
+        # Put skipped pages back so page numbers match the PDF
+        if content_pages is not None and len(content_pages) < total_pages:
+            _restore_skipped_pages(scene_analysis, content_pages, total_pages)
+        return scene_analysis
+    
+    async def process_pdf_scene_async(self, pdf_path: str, scene_id: str = None, **kwargs) -> Dict[str, Any]:
+        """
+        Process a PDF scene without blocking the caller's event loop
+        
+        Runs the synchronous process_pdf_scene in a worker thread; inside it the analyzer
+        issues Pass 2 page requests concurrently on an event loop of its own.
+        
+        Args:
+            pdf_path: Path to PDF file
+            scene_id: Optional scene identifier (default: file name plus a content hash)
+            **kwargs: Any other process_pdf_scene argument (extract_images, cleanup_images,
+                image_output_dir, include_statistics, return_audio_json)
+            
+        Returns:
+            Complete processing results
+        """
+        return await asyncio.to_thread(self.process_pdf_scene, pdf_path, scene_id, **kwargs)
+    
+    def flush_writes(self):
+        """Wait for background result file writes to finish"""
+        pending_writes, self._pending_writes = self._pending_writes, []
+        for future in pending_writes:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error writing result file: {e}")
+    
+    def _cleanup_page_images(self, image_dir: Path, image_paths: List[str] = None, remove_directory: bool = False):
         """
         Clean up extracted page images after processing
         
         Args:
             image_dir: Directory containing the extracted page images
+            image_paths: Images written for this scene (default: every page image in image_dir)
+            remove_directory: Remove image_dir with everything in it (only for directories the scene owns)
         """
         try:
             if not image_dir.exists():
                 logger.warning(f"Image directory {image_dir} does not exist, skipping cleanup")
                 return
             
-            # Count images before cleanup
-            image_files = list(image_dir.glob("*.png"))
+            if remove_directory:
+                shutil.rmtree(image_dir, ignore_errors=True)
+                logger.info(f"✓ Removed page image directory: {image_dir}")
+                return
+            
+            # Only remove what this scene wrote, so a shared image directory keeps other scenes' pages
+            if image_paths is not None:
+                image_files = [Path(path) for path in image_paths]
+            else:
+                # One directory scan instead of a glob per extension
+                with os.scandir(image_dir) as entries:
+                    image_files = [Path(entry.path) for entry in entries
+                                   if os.path.splitext(entry.name)[1] in _PAGE_IMAGE_EXTENSIONS and entry.is_file()]
             image_count = len(image_files)
             
             if image_count == 0:
                 logger.info("No page images found to clean up")
                 return
             
-            # Remove all PNG files in the directory
+            # Remove the page images
             for image_file in image_files:
                 try:
                     image_file.unlink()
-                    logger.debug(f"Removed: {image_file.name}")
+                    logger.debug("Removed: %s", image_file.name)
                 except Exception as e:
                     logger.warning(f"Failed to remove {image_file.name}: {e}")
             
@@ -311,14 +791,32 @@ class PDFToAudioPipeline:
     def process_multiple_pdfs(self, 
                              pdf_directory: str,
                              extract_images: bool = True,
-                             cleanup_images: bool = True) -> List[Dict[str, Any]]:
+                             cleanup_images: bool = True,
+                             resume: bool = True,
+                             workers: int = 1,
+                             tasks_per_worker: int = 8) -> List[Dict[str, Any]]:
         """
         Process multiple PDF files from a directory
         
+        Fully processed PDFs are recorded by content hash and pipeline configuration in
+        output_dir/progress.sqlite, so rerunning after a failure only pays for the
+        PDFs that did not finish or had failed pages.
+        
+        With workers > 1 the PDFs are processed in separate worker processes, each
+        with its own pipeline. Voice and character registries are then only shared
+        through their files, so characters that first appear in different PDFs at
+        the same time may not get consistent voices; keep workers=1 when that matters.
+        
+        Scene results leave out character statistics; get_pipeline_status reports
+        them for the whole batch once it is done.
+        
         Args:
             pdf_directory: Directory containing PDF files
             extract_images: Whether to extract and save page images
             cleanup_images: Whether to clean up extracted images after processing
+            resume: Reuse saved results for PDFs that were already processed
+            workers: Number of PDFs processed at once in worker processes
+            tasks_per_worker: PDFs a worker process handles before it is replaced (Python 3.11+)
             
         Returns:
             List of processing results for each PDF
@@ -328,30 +826,110 @@ class PDFToAudioPipeline:
             raise FileNotFoundError(f"PDF directory not found: {pdf_directory}")
         
         # Find all PDF files
-        pdf_files = list(pdf_dir.glob("*.pdf"))
+        pdf_files = find_files(str(pdf_dir), "*.pdf")
         if not pdf_files:
             logger.warning(f"No PDF files found in {pdf_directory}")
             return []
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
         
-        results = []
-        for pdf_file in sorted(pdf_files):
-            try:
-                result = self.process_pdf_scene(
-                    str(pdf_file),
-                    extract_images=extract_images,
-                    cleanup_images=cleanup_images
-                )
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
-                results.append({
-                    "scene_id": pdf_file.stem,
-                    "pdf_file": str(pdf_file),
-                    "error": str(e),
-                    "processing_timestamp": datetime.now().isoformat()
-                })
+        # Results are stored by index so they come back in reading order whatever finishes first
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pdf_files)
+        pending = []
+        progress_log = _ProgressLog(self.output_dir / "progress.sqlite")
+        
+        def failed_result(pdf_file: Path, error: Exception, digest: Optional[str] = None) -> Dict[str, Any]:
+            logger.error(f"Failed to process {pdf_file.name}: {str(error)}")
+            return {
+                # Same ID a successful run of this PDF gets, when the PDF could at least be hashed
+                "scene_id": _content_scene_id(pdf_file, digest) if digest else pdf_file.stem,
+                "pdf_file": str(pdf_file),
+                "error": str(error),
+                "processing_timestamp": datetime.now().isoformat()
+            }
+        
+        # Results from another model or rasterization setup are not reused, whatever the PDF
+        def progress_key(digest: str) -> str:
+            config = self._worker_config
+            return make_cache_key("pdf_progress", digest, self.scene_analyzer.analysis_config_digest,
+                                  self.enhancement_model_name, str(config["pdf_dpi"]), config["image_format"],
+                                  str(config["skip_blank_pages"]))
+        
+        def record_result(digest: str, result: Dict[str, Any]) -> Dict[str, Any]:
+            # Scenes with failed pages or untagged dialogue are processed again by the next run
+            if result.get("fully_processed"):
+                summary_file = self.output_dir / f"{result['scene_id']}_scene_summary.json"
+                progress_log.record(progress_key(digest), result["scene_id"], str(summary_file))
+            else:
+                logger.warning(f"{Path(result['pdf_file']).name} was only partly processed, it will be retried on resume")
+            return result
+        
+        try:
+            # hashlib releases the GIL on large reads, so the PDFs are hashed side by side
+            with ThreadPoolExecutor(max_workers=min(8, len(pdf_files)), thread_name_prefix="digest") as hasher:
+                digest_futures = [hasher.submit(_file_digest, pdf_file) for pdf_file in pdf_files]
+            
+            for index, pdf_file in enumerate(pdf_files):
+                try:
+                    digest = digest_futures[index].result()
+                    
+                    summary_path = progress_log.lookup(progress_key(digest)) if resume else None
+                    if summary_path and Path(summary_path).exists():
+                        data = Path(summary_path).read_bytes()
+                        results[index] = orjson.loads(data) if orjson is not None else json.loads(data)
+                        logger.info(f"Skipping {pdf_file.name}, already processed ({summary_path})")
+                        continue
+                    
+                    pending.append((index, pdf_file, digest))
+                except Exception as e:
+                    results[index] = failed_result(pdf_file, e)
+            
+            if workers > 1 and len(pending) > 1:
+                # Split the cores between the worker processes' own rasterization pools
+                worker_count = min(workers, len(pending))
+                rasterize_workers = max(1, (os.cpu_count() or 1) // worker_count)
+                # Each worker paces itself, so give each its share of the request and token budgets
+                worker_config = dict(self._worker_config)
+                for budget in ("requests_per_minute", "tokens_per_minute"):
+                    if worker_config[budget]:
+                        worker_config[budget] = max(1, worker_config[budget] // worker_count)
+                pool_options = {}
+                if sys.version_info >= (3, 11):
+                    # Replace workers periodically so memory held by caches and image buffers cannot build up
+                    pool_options["max_tasks_per_child"] = tasks_per_worker
+                with ProcessPoolExecutor(max_workers=worker_count, initializer=_init_pdf_worker,
+                                         initargs=(worker_config, rasterize_workers), **pool_options) as executor:
+                    futures = {
+                        executor.submit(_process_pdf_in_worker, str(pdf_file), _content_scene_id(pdf_file, digest),
+                                        extract_images, cleanup_images): (index, pdf_file, digest)
+                        for index, pdf_file, digest in pending
+                    }
+                    for completed, future in enumerate(as_completed(futures), 1):
+                        index, pdf_file, digest = futures[future]
+                        try:
+                            results[index] = record_result(digest, future.result())
+                            logger.info(f"[{completed}/{len(futures)}] Finished {pdf_file.name}")
+                        except Exception as e:
+                            results[index] = failed_result(pdf_file, e, digest)
+            else:
+                for index, pdf_file, digest in pending:
+                    try:
+                        result = self.process_pdf_scene(
+                            str(pdf_file),
+                            scene_id=_content_scene_id(pdf_file, digest),
+                            extract_images=extract_images,
+                            cleanup_images=cleanup_images,
+                            include_statistics=False,
+                            _defer_writes=True
+                        )
+                        results[index] = record_result(digest, result)
+                    except Exception as e:
+                        results[index] = failed_result(pdf_file, e, digest)
+        finally:
+            self.flush_writes()
+            progress_log.close()
+            # Stop paying for cached instructions that no request will reference
+            self.audio_enhancer.release_context_cache()
         
         return results
     
@@ -364,8 +942,8 @@ class PDFToAudioPipeline:
         """
         return {
             "output_directory": str(self.output_dir),
-            "vision_model": self.scene_analyzer.model.model_name,
-            "enhancement_model": self.audio_enhancer.model.model_name,
+            "vision_model": self.vision_model_name,
+            "enhancement_model": self.enhancement_model_name,
             "pdf_processor_dpi": self.pdf_processor.dpi,
             "character_statistics": self.consistency_manager.get_character_statistics(),
             "pipeline_ready": True
@@ -394,17 +972,20 @@ class PDFToAudioPipeline:
             Summary string
         """
         successful_scenes = [r for r in results if "error" not in r]
-        failed_scenes = [r for r in results if "error" in r]
+        failed_scenes = len(results) - len(successful_scenes)
         
-        total_pages = sum(r.get("total_pages", 0) for r in successful_scenes)
-        successful_pages = sum(r.get("successful_pages", 0) for r in successful_scenes)
-        failed_pages = sum(r.get("failed_pages", 0) for r in successful_scenes)
+        # Single pass over the scene results for the page counters
+        total_pages = successful_pages = failed_pages = 0
+        for r in successful_scenes:
+            total_pages += r.get("total_pages", 0)
+            successful_pages += r.get("successful_pages", 0)
+            failed_pages += r.get("failed_pages", 0)
         
         summary = f"""
 PDF-to-Audio Processing Summary:
 - Total Scenes Processed: {len(results)}
 - Successful Scenes: {len(successful_scenes)}
-- Failed Scenes: {len(failed_scenes)}
+- Failed Scenes: {failed_scenes}
 - Total Pages: {total_pages}
 - Successful Pages: {successful_pages}
 - Failed Pages: {failed_pages}
@@ -413,6 +994,48 @@ PDF-to-Audio Processing Summary:
         return summary.strip()
 
 
+# Pipeline owned by each process_multiple_pdfs worker process
+_worker_pipeline = None
+
+
+def _init_pdf_worker(config: Dict[str, Any], rasterize_workers: int):
+    """
+    Build the pipeline for a worker process (Gemini clients cannot be pickled)
+    
+    Args:
+        config: PDFToAudioPipeline constructor arguments
+        rasterize_workers: Rasterization processes this worker may use
+    """
+    global _worker_pipeline
+    _worker_pipeline = PDFToAudioPipeline(**config)
+    _worker_pipeline.pdf_processor.max_workers = rasterize_workers
+
+
+def _process_pdf_in_worker(pdf_path: str, scene_id: str, extract_images: bool, cleanup_images: bool) -> Dict[str, Any]:
+    """
+    Process one PDF in a worker process
+    
+    Args:
+        pdf_path: Path to PDF file
+        scene_id: Scene identifier
+        extract_images: Whether to extract and save page images
+        cleanup_images: Whether to clean up extracted images after processing
+        
+    Returns:
+        Processing results for the PDF
+    """
+    try:
+        result = _worker_pipeline.process_pdf_scene(pdf_path, scene_id=scene_id, extract_images=extract_images,
+                                                    cleanup_images=cleanup_images, include_statistics=False)
+    finally:
+        # Worker processes can be replaced or shut down between tasks without running any cleanup,
+        # so cached instructions are deleted after every scene rather than left billing until their TTL
+        _worker_pipeline.audio_enhancer.release_context_cache()
+    # Page buffers and analysis dicts of this scene are garbage now, free them before the next one
+    gc.collect()
+    return result
+
+
 def main():
     """Example usage of the PDF-to-Audio Pipeline"""
     
@@ -0,0 +1,83 @@
+"""
+Shared JSON Files
+Locking and atomic writes for JSON registries that several worker processes read and update
+"""
+
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # fcntl is POSIX only, elsewhere writes are still atomic but not serialized
+    fcntl = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def locked_file(file_path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock for a file across processes while its contents are read, merged and rewritten
+
+    Args:
+        file_path: File the lock protects (the lock itself lives in a .lock file next to it)
+    """
+    if fcntl is None:
+        yield
+        return
+
+    # The data file is replaced on every write, so the lock goes on a file that stays put
+    with open(f"{file_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_json_file(file_path: Path) -> Optional[Any]:
+    """
+    Read a JSON file
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Parsed contents, or None if the file does not exist or cannot be parsed
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable {file_path}: {e}")
+        return None
+
+
+def write_json_atomic(file_path: Path, data: Any):
+    """
+    Write a JSON file so readers only ever see the old or the new contents, never a partial file
+
+    Args:
+        file_path: Destination path
+        data: JSON-serializable data
+    """
+    file_path = Path(file_path)
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f"{file_path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates owner-only files, keep the usual permissions of the registry
+        os.chmod(tmp_name, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
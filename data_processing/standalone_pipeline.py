@@ -4,8 +4,8 @@ Standalone PDF-to-Audio Pipeline Function
 Simple function that takes PDF input and returns JSON output
 """
 
-import json
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Dict, Any, Optional
 from pathlib import Path
 import os
@@ -16,12 +16,53 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
 # Import pipeline components
 from pdf_to_audio_pipeline import PDFToAudioPipeline
+from pdf_processor import find_files
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _resolve_api_key(gemini_api_key: Optional[str]) -> str:
+    """
+    Get the Gemini API key from the argument or the environment
+    
+    Args:
+        gemini_api_key: Google AI API key (uses env var if not provided)
+        
+    Returns:
+        API key
+    """
+    api_key = gemini_api_key or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable or pass gemini_api_key parameter.")
+    return api_key
+
+
+def _create_pipeline(gemini_api_key: Optional[str], vision_model: str, enhancement_model: str,
+                     pdf_dpi: int, output_dir: str) -> PDFToAudioPipeline:
+    """
+    Create a pipeline after checking that a Gemini API key is available
+    
+    Args:
+        gemini_api_key: Google AI API key (uses env var if not provided)
+        vision_model: Gemini model for vision analysis
+        enhancement_model: Gemini model for audio enhancement
+        pdf_dpi: DPI for PDF to image conversion
+        output_dir: Directory to save outputs
+        
+    Returns:
+        Initialized PDFToAudioPipeline
+    """
+    return PDFToAudioPipeline(
+        output_dir=output_dir,
+        gemini_api_key=_resolve_api_key(gemini_api_key),
+        vision_model=vision_model,
+        enhancement_model=enhancement_model,
+        pdf_dpi=pdf_dpi
+    )
+
+
 def process_pdf(
     pdf_path: str,
     scene_id: Optional[str] = None,
@@ -31,7 +72,8 @@ def process_pdf(
     enhancement_model: str = "gemini-2.0-flash-lite",
     pdf_dpi: int = 300,
     cleanup_images: bool = True,
-    output_dir: str = "pipeline_output/intermediate"
+    output_dir: str = "pipeline_output/intermediate",
+    pipeline: Optional[PDFToAudioPipeline] = None
 ) -> Dict[str, Any]:
     """
     Standalone function to process PDF and return audio-ready JSON
@@ -46,6 +88,7 @@ def process_pdf(
         pdf_dpi: DPI for PDF to image conversion (default: 300)
         cleanup_images: Whether to clean up extracted images (default: True)
         output_dir: Directory to save outputs (default: "scenes")
+        pipeline: Already initialized pipeline to reuse (model and key arguments are then ignored)
     
     Returns:
         Dictionary containing the complete audio-ready JSON
@@ -64,45 +107,31 @@ def process_pdf(
         if not pdf_file.suffix.lower() == '.pdf':
             raise ValueError(f"File must be a PDF: {pdf_path}")
         
-        # Get API key
-        api_key = gemini_api_key or os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable or pass gemini_api_key parameter.")
-        
         # Generate scene ID if not provided
         if not scene_id:
             scene_id = f"scene_{pdf_file.stem}"
         
         logger.info(f"Processing PDF: {pdf_path}")
         logger.info(f"Scene ID: {scene_id}")
-        logger.info(f"Pass 1 Model (Character ID): {pass1_model}")
-        logger.info(f"Pass 2 Model (Dialogue): {pass2_model}")
-        logger.info(f"Enhancement Model: {enhancement_model}")
-        
-        # Initialize pipeline
-        pipeline = PDFToAudioPipeline(
-            output_dir=output_dir,
-            gemini_api_key=api_key,
-            vision_model=pass2_model,  # Use pass2_model for backward compatibility
-            enhancement_model=enhancement_model,
-            pdf_dpi=pdf_dpi
-        )
+        # Initialize pipeline unless the caller shares one across PDFs
+        if pipeline is None:
+            logger.info(f"Pass 1 Model (Character ID): {pass1_model}")
+            logger.info(f"Pass 2 Model (Dialogue): {pass2_model}")
+            logger.info(f"Enhancement Model: {enhancement_model}")
+            pipeline = _create_pipeline(gemini_api_key, pass2_model, enhancement_model, pdf_dpi, output_dir)
         
         # Process the PDF
         result = pipeline.process_pdf_scene(
             pdf_path=str(pdf_file),
             scene_id=scene_id,
             extract_images=True,
-            cleanup_images=cleanup_images
+            cleanup_images=cleanup_images,
+            return_audio_json=True
         )
         
-        # Load the generated JSON
-        json_file = Path(output_dir) / "page_unknown.json"
-        if not json_file.exists():
-            raise Exception("JSON output file was not created")
-        
-        with open(json_file, 'r', encoding='utf-8') as f:
-            audio_json = json.load(f)
+        # The pipeline hands back the JSON it wrote, no need to read page_unknown.json again
+        audio_json = result["audio_json"]
+        json_file = result["unified_json_file"]
         
         logger.info(f"✅ Successfully processed PDF: {pdf_path}")
         logger.info(f"📄 Total pages: {result.get('total_pages', 'unknown')}")
@@ -123,7 +152,8 @@ def process_multiple_pdfs_to_json(
     enhancement_model: str = "gemini-2.5-flash-lite",
     pdf_dpi: int = 300,
     cleanup_images: bool = True,
-    output_dir: str = "pipeline_output/intermediate"
+    output_dir: str = "pipeline_output/intermediate",
+    workers: int = 1
 ) -> Dict[str, Dict[str, Any]]:
     """
     Process multiple PDFs and return all JSON outputs
@@ -136,6 +166,9 @@ def process_multiple_pdfs_to_json(
         pdf_dpi: DPI for PDF to image conversion
         cleanup_images: Whether to clean up extracted images
         output_dir: Directory to save outputs
+        workers: Number of PDFs processed at once in worker processes. Each worker has its own
+            pipeline, so characters first seen in different PDFs at the same time may not get
+            consistent voices; keep workers=1 when that matters.
     
     Returns:
         Dictionary mapping PDF filenames to their JSON outputs
@@ -147,15 +180,43 @@ def process_multiple_pdfs_to_json(
             raise ValueError(f"Directory not found: {pdf_directory}")
         
         # Find all PDF files
-        pdf_files = list(pdf_dir.glob("*.pdf"))
+        pdf_files = find_files(str(pdf_dir), "*.pdf")
         if not pdf_files:
             raise ValueError(f"No PDF files found in: {pdf_directory}")
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
         
-        results = {}
+        # Keys are added in reading order up front so finishing order does not reorder the results
+        results: Dict[str, Dict[str, Any]] = dict.fromkeys(pdf_file.name for pdf_file in pdf_files)
+        
+        if workers > 1 and len(pdf_files) > 1:
+            # Rasterization is CPU bound, so each worker process gets its share of the cores
+            worker_count = min(workers, len(pdf_files))
+            rasterize_workers = max(1, (os.cpu_count() or 1) // worker_count)
+            pipeline_args = (_resolve_api_key(gemini_api_key), vision_model, enhancement_model, pdf_dpi, output_dir)
+            with ProcessPoolExecutor(max_workers=worker_count, initializer=_init_pdf_worker,
+                                     initargs=(pipeline_args, rasterize_workers)) as executor:
+                futures = {
+                    executor.submit(_process_pdf_in_worker, str(pdf_file), f"scene_{pdf_file.stem}",
+                                    cleanup_images, output_dir): pdf_file
+                    for pdf_file in pdf_files
+                }
+                for future in as_completed(futures):
+                    pdf_file = futures[future]
+                    try:
+                        results[pdf_file.name] = future.result()
+                        logger.info(f"Completed: {pdf_file.name}")
+                    except Exception as e:
+                        logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
+                        results[pdf_file.name] = {"error": str(e)}
+            
+            logger.info(f"📊 Processed {len(results)} PDFs total")
+            return results
         
-        for pdf_file in sorted(pdf_files):
+        # One pipeline for the whole directory, so clients and caches are set up once
+        pipeline = _create_pipeline(gemini_api_key, vision_model, enhancement_model, pdf_dpi, output_dir)
+        
+        for pdf_file in pdf_files:
             try:
                 logger.info(f"Processing: {pdf_file.name}")
                 
@@ -163,12 +224,9 @@ def process_multiple_pdfs_to_json(
                 json_output = process_pdf(
                     pdf_path=str(pdf_file),
                     scene_id=f"scene_{pdf_file.stem}",
-                    gemini_api_key=gemini_api_key,
-                    vision_model=vision_model,
-                    enhancement_model=enhancement_model,
-                    pdf_dpi=pdf_dpi,
                     cleanup_images=cleanup_images,
-                    output_dir=output_dir
+                    output_dir=output_dir,
+                    pipeline=pipeline
                 )
                 
                 results[pdf_file.name] = json_output
@@ -186,6 +244,43 @@ def process_multiple_pdfs_to_json(
         raise
 
 
+# Pipeline owned by each process_multiple_pdfs_to_json worker process
+_worker_pipeline: Optional[PDFToAudioPipeline] = None
+
+
+def _init_pdf_worker(pipeline_args: tuple, rasterize_workers: int):
+    """
+    Build the pipeline for a worker process (Gemini clients cannot be pickled)
+    
+    Args:
+        pipeline_args: Positional arguments for _create_pipeline
+        rasterize_workers: Rasterization processes this worker may use
+    """
+    global _worker_pipeline
+    _worker_pipeline = _create_pipeline(*pipeline_args)
+    _worker_pipeline.pdf_processor.max_workers = rasterize_workers
+
+
+def _process_pdf_in_worker(pdf_path: str, scene_id: str, cleanup_images: bool, output_dir: str) -> Dict[str, Any]:
+    """
+    Process one PDF in a worker process
+    
+    Args:
+        pdf_path: Path to the PDF file
+        scene_id: Scene identifier
+        cleanup_images: Whether to clean up extracted images
+        output_dir: Directory to save outputs
+        
+    Returns:
+        Audio-ready JSON for the PDF
+    """
+    audio_json = process_pdf(pdf_path=pdf_path, scene_id=scene_id, cleanup_images=cleanup_images,
+                             output_dir=output_dir, pipeline=_worker_pipeline)
+    # Worker processes exit without waiting on background threads, so the scene summary is written first
+    _worker_pipeline.flush_writes()
+    return audio_json
+
+
 # Example usage
 if __name__ == "__main__":
     # Example 1: Process single PDF
@@ -0,0 +1,9 @@
+"""
+Test configuration
+Makes the data_processing modules importable the way the scripts import each other
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
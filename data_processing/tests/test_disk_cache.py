@@ -0,0 +1,29 @@
+"""
+Tests for disk cache keys and storage
+"""
+
+from disk_cache import DiskCache, make_cache_key
+
+
+def test_make_cache_key_is_stable():
+    assert make_cache_key("model", "prompt", "digest") == make_cache_key("model", "prompt", "digest")
+
+
+def test_make_cache_key_treats_str_and_bytes_alike():
+    assert make_cache_key("abc") == make_cache_key(b"abc")
+
+
+def test_make_cache_key_depends_on_order_and_boundaries():
+    assert make_cache_key("a", "b") != make_cache_key("b", "a")
+    # Length prefixes keep parts from running into each other
+    assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+    assert make_cache_key("a", "") != make_cache_key("a")
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    key = make_cache_key("scene", "digest")
+    
+    assert cache.get(key) is None
+    cache.set(key, {"pages": [1, 2]})
+    assert cache.get(key) == {"pages": [1, 2]}
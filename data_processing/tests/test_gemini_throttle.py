@@ -0,0 +1,109 @@
+"""
+Tests for Gemini request pacing and retries, driven by a fake clock
+"""
+
+import pytest
+
+pytest.importorskip("google.api_core")
+
+from google.api_core import exceptions as google_exceptions
+
+import gemini_throttle
+from gemini_throttle import RequestPacer, call_with_retry
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep, advancing only when slept"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(gemini_throttle.time, "monotonic", fake_clock.monotonic)
+    monkeypatch.setattr(gemini_throttle.time, "sleep", fake_clock.sleep)
+    return fake_clock
+
+
+def test_pacer_spaces_requests(clock):
+    pacer = RequestPacer(requests_per_minute=60)
+    
+    for _ in range(3):
+        pacer.wait()
+    
+    assert clock.sleeps == [1.0, 1.0]
+    assert clock.now == 2.0
+
+
+def test_pacer_charges_tokens_to_the_following_request(clock):
+    pacer = RequestPacer(requests_per_minute=None, tokens_per_minute=600)
+    
+    pacer.wait(tokens=100)
+    pacer.wait(tokens=10)
+    
+    # 100 tokens at 10 tokens per second push the next request back 10 seconds
+    assert clock.sleeps == [10.0]
+
+
+def test_pacer_without_limits_never_waits(clock):
+    pacer = RequestPacer(requests_per_minute=None)
+    
+    for _ in range(5):
+        pacer.wait(tokens=1000)
+    
+    assert clock.sleeps == []
+
+
+def test_call_with_retry_backs_off_until_success(clock, monkeypatch):
+    monkeypatch.setattr(gemini_throttle.random, "uniform", lambda low, high: high)
+    failures = [google_exceptions.ResourceExhausted("429"), google_exceptions.InternalServerError("500")]
+    
+    def request():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+    
+    assert call_with_retry(request, max_retries=3) == "ok"
+    # Equal jitter with the random half at its maximum sleeps the full backoff: 1s, then 2s
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_call_with_retry_raises_after_max_retries(clock):
+    calls = []
+    
+    def request():
+        calls.append(1)
+        raise google_exceptions.ServiceUnavailable("503")
+    
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        call_with_retry(request, max_retries=2)
+    assert len(calls) == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_call_with_retry_does_not_retry_other_errors(clock):
+    def request():
+        raise google_exceptions.InvalidArgument("400")
+    
+    with pytest.raises(google_exceptions.InvalidArgument):
+        call_with_retry(request, max_retries=5)
+    assert clock.sleeps == []
+
+
+def test_call_with_retry_consults_the_pacer(clock):
+    pacer = RequestPacer(requests_per_minute=30)
+    
+    call_with_retry(lambda: None, max_retries=0, pacer=pacer)
+    call_with_retry(lambda: None, max_retries=0, pacer=pacer)
+    
+    assert clock.sleeps == [2.0]
@@ -0,0 +1,25 @@
+"""
+Tests for PDF file discovery
+"""
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from pdf_processor import find_files
+
+
+def test_find_files_sorts_naturally_and_ignores_case(tmp_path):
+    for name in ("ch10.pdf", "ch2.PDF", "Ch1.pdf", "notes.txt", "ch3.pdf.bak"):
+        (tmp_path / name).write_bytes(b"")
+    
+    assert [path.name for path in find_files(str(tmp_path), "*.pdf")] == ["Ch1.pdf", "ch2.PDF", "ch10.pdf"]
+
+
+def test_find_files_skips_directories_and_subdirectories(tmp_path):
+    (tmp_path / "ch1.pdf").write_bytes(b"")
+    (tmp_path / "folder.pdf").mkdir()
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "ch2.pdf").write_bytes(b"")
+    
+    assert find_files(str(tmp_path), "*.pdf") == [tmp_path / "ch1.pdf"]
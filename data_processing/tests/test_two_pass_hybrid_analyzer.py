@@ -0,0 +1,92 @@
+"""
+Tests for the pure helpers of the two-pass hybrid analyzer
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")
+
+from two_pass_hybrid_analyzer import TwoPassHybridAnalyzer, _extract_json_text
+
+
+@pytest.mark.parametrize("response_text, expected", [
+    ('{"a": 1}', '{"a": 1}'),
+    ('  [{"a": 1}]\n', '[{"a": 1}]'),
+    ('```json\n{"a": 1}\n```', '{"a": 1}'),
+    ('Here you go:\n```\n[{"a": 1}]\n```\nDone.', '[{"a": 1}]'),
+    ('Sure! {"a": {"b": [1, 2]}} Hope that helps.', '{"a": {"b": [1, 2]}}'),
+    ('Page [3] analysis: {"scene": "x"}', '{"scene": "x"}'),
+    ('Look at {this} first, then {"scene": "x"}', '{"scene": "x"}'),
+])
+def test_extract_json_text_finds_the_json_value(response_text, expected):
+    assert _extract_json_text(response_text) == expected
+    json.loads(_extract_json_text(response_text))
+
+
+def test_extract_json_text_falls_back_to_any_json_value():
+    assert _extract_json_text("Only [1, 2] here") == "[1, 2]"
+
+
+def test_extract_json_text_leaves_text_without_json_alone():
+    assert _extract_json_text("no json here") == "no json here"
+    assert _extract_json_text('truncated {"a":') == 'truncated {"a":'
+
+
+@pytest.fixture
+def analyzer():
+    # The scene-building helpers never touch Gemini, so the constructor (and its API key) is skipped
+    return TwoPassHybridAnalyzer.__new__(TwoPassHybridAnalyzer)
+
+
+def _pages(count):
+    return [{"page_number": page_number, "scene": f"scene {page_number}", "dialogue_order": []}
+            for page_number in range(1, count + 1)]
+
+
+def _context(*characters):
+    return {"character_identification": {"characters": list(characters)}}
+
+
+def test_appearance_percentage_is_relative_to_total_pages(analyzer):
+    context = _context({"name": "Eren", "appears_in_pages": [1, 2, 3, 3]})
+    
+    consistency = analyzer._build_final_scene_analysis(_pages(10), context, "s")["characters"]["consistency"]
+    
+    # Repeated page numbers count once
+    assert consistency["Eren"]["appearance_count"] == 3
+    assert consistency["Eren"]["appearance_percentage"] == 30.0
+
+
+@pytest.mark.parametrize("pages_appeared, importance", [
+    (list(range(1, 8)), "main"),
+    (list(range(1, 7)), "supporting"),
+    ([1, 2, 3], "supporting"),
+    ([1, 2], "background"),
+    ([], "background"),
+])
+def test_importance_falls_back_to_appearance_thresholds(analyzer, pages_appeared, importance):
+    context = _context({"name": "Eren", "appears_in_pages": pages_appeared, "importance": "main/supporting/background"})
+    
+    scene_analysis = analyzer._build_final_scene_analysis(_pages(10), context, "s")
+    
+    assert scene_analysis["characters"]["consistency"]["Eren"]["importance"] == importance
+
+
+def test_reported_importance_is_kept(analyzer):
+    context = _context({"name": "Levi", "appears_in_pages": [1], "importance": "Main"})
+    
+    scene_analysis = analyzer._build_final_scene_analysis(_pages(10), context, "s")
+    
+    assert scene_analysis["characters"]["consistency"]["Levi"]["importance"] == "main"
+    assert scene_analysis["scene_summary"]["main_characters"] == ["Levi"]
+
+
+def test_empty_scene_builds_without_pages(analyzer):
+    scene_analysis = analyzer._build_final_scene_analysis([], {}, "s")
+    
+    assert scene_analysis["total_pages"] == 0
+    assert scene_analysis["characters"]["character_count"] == 0
+    assert scene_analysis["ambient_context"] == ""
@@ -5,15 +5,43 @@ Pass 1: All pages together for character identification
 Pass 2: Individual pages with character context
 """
 
+import asyncio
+import copy
+import hashlib
+import io
 import json
 import logging
-from typing import Dict, List, Any, Set, Optional
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Set, Optional, Tuple, Iterable, Union
 from pathlib import Path
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict, deque
 import google.generativeai as genai
+from PIL import Image, ImageChops, ImageOps
 from dotenv import load_dotenv
 import os
 
+from context_cache import ContextCachedModel, get_generative_model
+from disk_cache import DiskCache, make_cache_key
+from gemini_throttle import THROTTLING_ERRORS, RequestPacer, call_with_retry, estimate_tokens
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to stdlib json
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional, Pass 2 results are then parsed without schema validation
+    msgspec = None
+
+try:
+    from google import genai as google_genai
+except ImportError:  # google-genai is optional, only the Batch API mode needs it
+    google_genai = None
+
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
@@ -21,11 +49,299 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Matches a markdown code fence anywhere in a response, capturing the body
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+# Finds where a JSON value ends when a response has prose around it
+_JSON_DECODER = json.JSONDecoder()
+
+# Places a JSON object or array could start
+_JSON_START_RE = re.compile(r"[{\[]")
+
+# Asks Gemini for bare JSON, so responses need no fence stripping
+_JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+def _extract_json_text(response_text: str) -> str:
+    """
+    Cut the JSON value out of a response that may wrap it in a code fence or prose
+    
+    Args:
+        response_text: Raw response text
+        
+    Returns:
+        JSON text (left as is when no JSON value can be located, so the parser reports the error)
+    """
+    text = response_text.strip()
+    if (text[:1], text[-1:]) in (("{", "}"), ("[", "]")):
+        return text
+    
+    match = _FENCE_RE.search(text)
+    if match:
+        text = match.group(1).strip()
+    
+    # Prose can hold brackets of its own ("Page [3] analysis: {...}"), so try every opening bracket in
+    # turn and prefer an object or a list of objects, which is what every prompt asks for
+    first_value = None
+    for start_match in _JSON_START_RE.finditer(text):
+        start = start_match.start()
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            continue
+        if isinstance(value, dict) or (isinstance(value, list) and all(isinstance(item, dict) for item in value)):
+            return text[start:end]
+        if first_value is None:
+            first_value = text[start:end]
+    return first_value if first_value is not None else text
+
+if msgspec is not None:
+    # Pass 2 page analysis schema; optional fields the model leaves out or sets to null are omitted
+    class _SpeakingCharacter(msgspec.Struct, omit_defaults=True):
+        name: str
+        expression: Optional[str] = None
+        visual_cues: Optional[str] = None
+        dialogue_count: Optional[int] = None
+
+    class _DialogueLine(msgspec.Struct, omit_defaults=True):
+        speaker: str
+        text: str
+        emotion: Optional[str] = None
+        confidence: Optional[str] = None
+        visual_analysis: Optional[str] = None
+
+    class _PageAnalysis(msgspec.Struct):
+        page_number: int = 0
+        scene: Optional[str] = ""
+        speaking_characters: List[_SpeakingCharacter] = []
+        dialogue_order: List[_DialogueLine] = []
+        ambient: Optional[str] = ""
+
+    # Decode and validate in a single pass (strict=False accepts numbers sent as strings)
+    _PAGE_DECODER = msgspec.json.Decoder(_PageAnalysis, strict=False)
+    _PAGE_BATCH_DECODER = msgspec.json.Decoder(List[_PageAnalysis], strict=False)
+
+
+def _page_response_schema(batch: bool = False) -> Dict[str, Any]:
+    """
+    Gemini response schema for Pass 2 page analyses, mirroring the JSON format in the instructions
+    
+    Args:
+        batch: Whether the response is an array of page analyses
+        
+    Returns:
+        Schema dict for generation_config["response_schema"]
+    """
+    speaking_character = {
+        "type": "OBJECT",
+        "properties": {
+            "name": {"type": "STRING"},
+            "expression": {"type": "STRING"},
+            "visual_cues": {"type": "STRING"},
+            "dialogue_count": {"type": "INTEGER"}
+        },
+        "required": ["name"]
+    }
+    dialogue_line = {
+        "type": "OBJECT",
+        "properties": {
+            "speaker": {"type": "STRING"},
+            "text": {"type": "STRING"},
+            "emotion": {"type": "STRING"},
+            "confidence": {"type": "STRING", "enum": ["high", "medium", "low"]},
+            "visual_analysis": {"type": "STRING"}
+        },
+        "required": ["speaker", "text"]
+    }
+    page_analysis = {
+        "type": "OBJECT",
+        "properties": {
+            "page_number": {"type": "INTEGER"},
+            "scene": {"type": "STRING"},
+            "speaking_characters": {"type": "ARRAY", "items": speaking_character},
+            "dialogue_order": {"type": "ARRAY", "items": dialogue_line},
+            "ambient": {"type": "STRING"}
+        },
+        "required": ["page_number", "scene", "speaking_characters", "dialogue_order"]
+    }
+    return {"type": "ARRAY", "items": page_analysis} if batch else page_analysis
+
+
+# Character importance levels Pass 1 is asked to choose from
+_CHARACTER_IMPORTANCE = frozenset(("main", "supporting", "background"))
+
+# Scene description of the placeholder analysis returned for failed pages
+_FAILED_SCENE = "Analysis failed"
+
+# Pages encoded at once while later pages are still being rasterized; also bounds decoded pages held in memory
+_ENCODE_PREFETCH = 4
+
+# Pass 2 analyses kept in memory for repeated pages; older ones are still found in the disk cache
+_PAGE_CACHE_SIZE = 512
+
+# Fewer pending pages than this are sent in real time, a batch job's queueing delay is not worth it
+_BATCH_API_MIN_PAGES = 8
+
+# Inline batch jobs are limited to 20 MB of requests; images grow by a third when base64 encoded
+_BATCH_API_MAX_INLINE_BYTES = 15 * 1024 * 1024
+
+# Terminal states of a Gemini batch job
+_BATCH_JOB_DONE_STATES = frozenset(("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"))
+
+# Pass 1 prompt, formatted with the number of pages in the scene
+_CHARACTER_ID_PROMPT = """
+        Analyze these {page_count} manga pages together to identify characters consistently across all pages.
+
+        CRITICAL CHARACTER IDENTIFICATION RULES:
+        1. TRY TO IDENTIFY ACTUAL CHARACTER NAMES from the manga (e.g., "Eren", "Mikasa", "Hannes")
+        2. ONLY use generic names (Person A, Person B, Person C) if you cannot identify the actual character
+        3. MAIN TASK: Identify the SAME character with the SAME identifier across ALL pages
+        4. Use visual features to identify characters consistently (hair color, clothing, facial features)
+        5. Focus on characters who speak (have dialogue) across the pages
+        6. Ignore background characters without dialogue
+        7. DISTINGUISH between speaking characters and sound effects/onomatopoeia
+        8. Sound effects like "SNIFF", "fwOOO", "THUD" are NOT characters - they are environmental sounds
+
+        Return ONLY valid JSON in this exact format:
+        {{
+            "character_identification": {{
+                "total_unique_characters": 0,
+                "characters": [
+                    {{
+                        "name": "Character_A",
+                        "appears_in_pages": [1, 2, 3],
+                        "visual_description": "consistent visual features across all pages",
+                        "gender_hint": "male/female/unknown",
+                        "importance": "main/supporting/background"
+                    }}
+                ]
+            }},
+            "character_consistency_rules": {{
+                "Character_A": "Use this exact name for this character across all pages",
+                "Character_B": "Use this exact name for this character across all pages"
+            }}
+        }}
+
+        Focus ONLY on:
+        - Character identification across pages
+        - Visual consistency
+        - Speaking characters only
+        - Generic naming (Character_A, Character_B, etc.)
+        """
+
+# Pass 2 instructions, formatted once per scene with page_number="N" and the character context
+_PAGE_ANALYSIS_PROMPT = """
+        Analyze this manga page (page {page_number}) and extract dialogue information using the character context provided.
+
+        {character_context}
+
+        CRITICAL SPEAKER IDENTIFICATION RULES:
+        1. CAREFULLY examine each speech bubble to identify WHO is actually speaking
+        2. Look at the speech bubble's position, tail direction, and visual connection to characters
+        3. PAY SPECIAL ATTENTION to speech bubble tails - they point to the character who is speaking
+        4. If multiple speech bubbles are connected or sequential, they likely belong to the SAME speaker
+        5. Use the EXACT character names from the context above (try to identify actual names like "Eren", "Mikasa", "Hannes")
+        6. Extract ALL dialogue text from speech bubbles in reading order (right to left, top to bottom)
+        7. Provide detailed emotion analysis with confidence levels for each dialogue line
+        8. Include visual cues (facial expressions, body language) for emotion detection
+        9. Provide ambient context (environmental sounds, atmosphere)
+        10. Focus on speaking characters only
+        11. DOUBLE-CHECK speaker attribution by examining speech bubble connections to characters
+
+        SOUND EFFECTS AND ONOMATOPOEIA RULES:
+        1. Onomatopoeia (sound effects) like "SNIFF", "fwOOO", "THUD", "CRASH" should be treated as SOUND EFFECTS
+        2. Sound effects should be placed in [brackets] format: "[SNIFF]", "[fwOOO]", "[THUD]"
+        3. Sound effects should have speaker: "Sound Effect" and NOT be attributed to characters
+        4. Only actual spoken dialogue should be attributed to characters
+        5. Distinguish between character dialogue and environmental sound effects
+
+        Emotion categories to consider:
+        - happy, excited, joyful, cheerful, delighted
+        - sad, depressed, melancholy, tearful, sorrowful
+        - angry, furious, enraged, frustrated, irritated
+        - surprised, shocked, amazed, startled, bewildered
+        - fearful, scared, terrified, anxious, worried
+        - calm, peaceful, serene, relaxed, composed
+        - confused, puzzled, bewildered, uncertain
+        - determined, resolute, focused, serious
+        - sarcastic, mocking, dismissive, condescending
+        - curious, interested, questioning, intrigued
+        - embarrassed, ashamed, guilty, sheepish
+        - proud, confident, arrogant, smug
+        - neutral, expressionless, blank, stoic
+
+        Return ONLY valid JSON in this exact format:
+        {{
+            "page_number": {page_number},
+            "scene": "brief description of what's happening",
+            "speaking_characters": [
+                {{"name": "Character_A", "expression": "detailed emotional state", "visual_cues": "facial expression, body language", "dialogue_count": number_of_speech_bubbles}}
+            ],
+            "dialogue_order": [
+                {{"speaker": "Character_A", "text": "exact dialogue text", "emotion": "primary emotion", "confidence": "high/medium/low", "visual_analysis": "what you see in the image"}},
+                {{"speaker": "Sound Effect", "text": "[SNIFF]", "emotion": "neutral", "confidence": "high", "visual_analysis": "onomatopoeia sound effect"}}
+            ],
+            "ambient": "environmental context and atmosphere"
+        }}
+
+        EXAMPLES OF CORRECT FORMATTING:
+        - Character dialogue: {{"speaker": "Eren", "text": "I will destroy all Titans!", "emotion": "determined"}}
+        - Sound effects: {{"speaker": "Sound Effect", "text": "[SNIFF]", "emotion": "neutral"}}
+        - Sound effects: {{"speaker": "Sound Effect", "text": "[fwOOO]", "emotion": "neutral"}}
+        - Sound effects: {{"speaker": "Sound Effect", "text": "[THUD]", "emotion": "neutral"}}
+
+        Focus on:
+        - CAREFULLY identifying WHO is speaking in each speech bubble (examine bubble position and tail direction)
+        - Using EXACT character names from context (prefer actual names like Eren, Mikasa, Hannes)
+        - Separating character dialogue from sound effects/onomatopoeia
+        - Putting sound effects in [brackets] format with speaker: "Sound Effect"
+        - Accurate dialogue extraction from speech bubbles in right-to-left reading order
+        - Detailed emotion detection based on visual cues
+        - Comprehensive analysis for audio narration generation
+        """
+
+# Pass 2 request for a single page
+_PAGE_REQUEST_PROMPT = """
+        Analyze the attached manga page. This is page {page_number}, so N = {page_number}.
+"""
+
+# Pass 2 request when several pages are sent at once
+_PAGE_BATCH_PREAMBLE = """
+        You are given {page_count} manga pages in reading order: pages {page_numbers}.
+        Analyze EACH page on its own following your instructions, where N stands for that page's number.
+        Return ONLY a valid JSON array with exactly {page_count} objects, one per page, in the order the images were provided.
+        The JSON format below describes ONE element of that array.
+        Set "page_number" in each object to the number of the page it describes.
+"""
+
+
+def _is_grayscale(image: Image.Image, tolerance: int = 8) -> bool:
+    """
+    Check whether an RGB image is effectively black and white, as most manga pages are
+    
+    Args:
+        image: RGB image
+        tolerance: Largest channel difference still treated as gray (absorbs scan noise)
+        
+    Returns:
+        True if no pixel has visible color
+    """
+    red, green, blue = image.split()
+    return (ImageChops.difference(red, green).getextrema()[1] <= tolerance
+            and ImageChops.difference(green, blue).getextrema()[1] <= tolerance)
+
 
 class TwoPassHybridAnalyzer:
     """Two-pass approach: character identification + individual dialogue extraction"""
     
-    def __init__(self, api_key: str = None, pass1_model: str = "gemini-2.0-flash", pass2_model: str = "gemini-2.5-pro"):
+    def __init__(self, api_key: str = None, pass1_model: str = "gemini-2.0-flash", pass2_model: str = "gemini-2.5-pro",
+                 max_concurrency: int = 5, pages_per_request: int = 1,
+                 use_file_api: bool = True, file_cache_ttl: float = 3600.0,
+                 use_context_cache: bool = True, max_image_dimension: Optional[int] = 1568,
+                 max_retries: int = 5, requests_per_minute: Optional[int] = None,
+                 cache_dir: Optional[str] = None, jpeg_quality: int = 85, image_format: str = "jpeg",
+                 tokens_per_minute: Optional[int] = None, use_batch_api: bool = False,
+                 batch_api_timeout: float = 1800.0):
         """
         Initialize two-pass hybrid analyzer with different models for each pass
         
@@ -33,35 +349,124 @@ class TwoPassHybridAnalyzer:
             api_key: Google AI API key
             pass1_model: Gemini model for Pass 1 (character identification) - default: gemini-2.0-flash
             pass2_model: Gemini model for Pass 2 (dialogue extraction) - default: gemini-2.5-pro
+            max_concurrency: Maximum number of Pass 2 page requests in flight at once
+            pages_per_request: Number of pages sent in each Pass 2 request (1 = one page per request)
+            use_file_api: Upload page images once through the Gemini Files API and reuse them across requests
+            file_cache_ttl: Seconds an uploaded image is kept for reuse before it is deleted
+            use_context_cache: Send the per-scene Pass 2 instructions through Gemini context caching
+            max_image_dimension: Longest side in pixels of page images sent to Gemini (None keeps full size)
+            max_retries: Retries with exponential backoff when Gemini rate limits or is overloaded
+            requests_per_minute: Optional cap used to pace Gemini requests proactively
+            cache_dir: Optional directory where finished scene analyses are cached across runs
+            jpeg_quality: Lossy quality of page images sent to Gemini (JPEG or WebP)
+            image_format: Format of page images sent to Gemini, "jpeg" or "webp"
+            tokens_per_minute: Optional input token budget used to pace Gemini requests proactively
+            use_batch_api: Send Pass 2 through the half-price Gemini Batch API when a scene has enough pages
+                (needs the google-genai package; results take minutes to hours instead of seconds)
+            batch_api_timeout: Seconds to wait for batch jobs before cancelling them and falling back to
+                real-time requests; the pipeline thread (or worker process) is held for that long
         """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
             raise ValueError("Google API key not provided. Set GOOGLE_API_KEY environment variable.")
         
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        self.pass1_model = genai.GenerativeModel(pass1_model)  # Fast model for character identification
-        self.pass2_model = genai.GenerativeModel(pass2_model)  # Powerful model for dialogue extraction
+        # Configure Gemini (models are shared with any other analyzer in this process)
+        self.pass1_model = get_generative_model(pass1_model, self.api_key)  # Fast model for character identification
+        self.pass2_model = get_generative_model(pass2_model, self.api_key)  # Powerful model for dialogue extraction
+        self.pass1_model_name = pass1_model
+        self.pass2_model_name = pass2_model
+        self.use_context_cache = use_context_cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.pages_per_request = max(1, pages_per_request)
+        self.max_image_dimension = max_image_dimension
+        self.jpeg_quality = jpeg_quality
+        self._image_format = "WEBP" if image_format.lower() == "webp" else "JPEG"
+        self._mime_type = f"image/{self._image_format.lower()}"
+        self.max_retries = max(0, max_retries)
+        
+        # Everything besides the pages that shapes an analysis; cache keys built on it go stale
+        # whenever a model, a prompt or the way pages are encoded and grouped changes
+        self.analysis_config_digest = make_cache_key(
+            "analysis_config", self.pass1_model_name, self.pass2_model_name,
+            _CHARACTER_ID_PROMPT, _PAGE_ANALYSIS_PROMPT, _PAGE_REQUEST_PROMPT,
+            str(self.pages_per_request), str(self.max_image_dimension), str(self.jpeg_quality), self._image_format)
+        
+        self._pacer = RequestPacer(requests_per_minute, tokens_per_minute) if requests_per_minute or tokens_per_minute else None
+        
+        # Uploaded page images keyed by content hash: digest -> (file handle, upload time)
+        self.use_file_api = use_file_api
+        self.file_cache_ttl = file_cache_ttl
+        self._file_cache: Dict[str, Any] = {}
+        # Uploads in progress by digest, so concurrent requests for the same page wait for one upload
+        self._file_uploads: Dict[str, Future] = {}
+        self._file_cache_lock = threading.Lock()
+        
+        # Finished scene analyses keyed by analysis config and page contents
+        self._result_cache = DiskCache(cache_dir) if cache_dir else None
+        
+        # Successful Pass 2 analyses keyed by (image digest, character context digest), least recently used first
+        self._page_analysis_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        
+        # Batch API client, created on first use
+        if use_batch_api and google_genai is None:
+            logger.warning("use_batch_api needs the google-genai package, Pass 2 will use real-time requests")
+        self.use_batch_api = use_batch_api and google_genai is not None
+        self.batch_api_timeout = batch_api_timeout
+        self._batch_client = None
         
         logger.info(f"Two-Pass Hybrid Analyzer initialized with Pass 1 model: {pass1_model}, Pass 2 model: {pass2_model}")
     
-    def analyze_scene_characters(self, page_images: List[str], scene_id: str = None) -> Dict[str, Any]:
+    def analyze_scene_characters(self, page_images: Iterable[Union[str, Image.Image, bytes]], scene_id: str = None) -> Dict[str, Any]:
         """
         Analyze scene using two-pass approach
         
         Args:
-            page_images: List of image paths for all pages in the scene
+            page_images: Image paths, PIL Images or bytes encoded in image_format for all pages in the scene, in page order
             scene_id: Optional scene identifier
             
         Returns:
             Scene analysis with character consistency information
         """
+        # Pass 2 runs its page requests on an event loop of its own, which cannot start inside a running
+        # one, and blocking that loop until the scene is done would freeze every other task on it
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("analyze_scene_characters blocks until the scene is analyzed and cannot run inside "
+                               "an event loop, await analyze_scene_characters_async instead")
+        
         try:
+            # Encode every page once; both passes send the same compact image bytes. Uploads
+            # start as soon as a page is encoded, overlapping rasterization of later pages
+            if self.use_file_api:
+                with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="page-upload") as upload_pool:
+                    page_images = self._load_pages(page_images, upload_pool)
+            else:
+                page_images = self._load_pages(page_images)
+            
             if not scene_id:
                 scene_id = f"scene_{len(page_images)}_pages"
             
             logger.info(f"Analyzing scene '{scene_id}' with {len(page_images)} pages (TWO-PASS APPROACH)")
             
+            if not page_images:
+                # Nothing to send; an empty analysis keeps callers working without spending a request
+                logger.warning(f"No page images found for scene '{scene_id}', skipping analysis")
+                return self._build_final_scene_analysis([], {}, scene_id)
+            
+            cache_key = None
+            if self._result_cache is not None:
+                cache_key = make_cache_key("scene_analysis", self.analysis_config_digest,
+                                           *map(self._image_digest, page_images))
+                cached_analysis = self._result_cache.get(cache_key)
+                if cached_analysis is not None:
+                    logger.info(f"Reusing cached analysis for scene '{scene_id}'")
+                    cached_analysis["scene_id"] = scene_id
+                    cached_analysis["analysis_file"] = str(self._result_cache.path_for(cache_key))
+                    return cached_analysis
+            
             # PASS 1: Analyze all pages together for character identification
             logger.info("PASS 1: Analyzing all pages together for character identification...")
             character_context = self._pass1_character_identification(page_images, scene_id)
@@ -75,99 +480,68 @@ class TwoPassHybridAnalyzer:
             
             logger.info(f"Scene analysis complete: {scene_analysis['characters']['character_count']} unique characters found")
             
+            # Drop uploads that are too old to be worth reusing
+            self.purge_file_cache(self.file_cache_ttl)
+            
+            # Only cache scenes where every page was analyzed
+            if cache_key is not None and not any(page.get("scene") == _FAILED_SCENE for page in individual_analyses):
+                self._result_cache.set(cache_key, scene_analysis)
+                # Lets callers reference the full analysis on disk instead of copying it
+                scene_analysis["analysis_file"] = str(self._result_cache.path_for(cache_key))
+            
             return scene_analysis
             
         except Exception as e:
             logger.error(f"Error analyzing scene characters: {str(e)}")
             raise
     
-    def _pass1_character_identification(self, page_images: List[str], scene_id: str) -> Dict[str, Any]:
+    async def analyze_scene_characters_async(self, page_images: Iterable[Union[str, Image.Image, bytes]],
+                                             scene_id: str = None) -> Dict[str, Any]:
+        """
+        Analyze scene using two-pass approach without blocking the calling event loop
+        
+        Runs analyze_scene_characters in a worker thread, where Pass 2 gets an event loop of its own.
+        
+        Args:
+            page_images: Image paths, PIL Images or bytes encoded in image_format for all pages in the scene, in page order
+            scene_id: Optional scene identifier
+            
+        Returns:
+            Scene analysis with character consistency information
+        """
+        return await asyncio.to_thread(self.analyze_scene_characters, page_images, scene_id)
+    
+    def _pass1_character_identification(self, page_images: List[bytes], scene_id: str) -> Dict[str, Any]:
         """
         PASS 1: Analyze all pages together to identify characters consistently
         
         Args:
-            page_images: List of image paths for all pages in the scene
+            page_images: Encoded images for all pages in the scene
             scene_id: Scene identifier
             
         Returns:
             Character identification context
         """
         
-        # Load all images
-        images = []
-        for image_path in page_images:
-            if Path(image_path).exists():
-                with open(image_path, 'rb') as f:
-                    image_data = f.read()
-                images.append({
-                    "mime_type": "image/png",
-                    "data": image_data
-                })
-                logger.info(f"Loaded: {Path(image_path).name}")
-            else:
-                logger.warning(f"Image not found: {image_path}")
+        # Get content parts for all images
+        images = [self._get_image_part(image_data) for image_data in page_images]
         
         if not images:
             raise ValueError("No images found to analyze")
         
         # Create focused prompt for character identification only
-        prompt = f"""
-        Analyze these {len(page_images)} manga pages together to identify characters consistently across all pages.
-
-        CRITICAL CHARACTER IDENTIFICATION RULES:
-        1. TRY TO IDENTIFY ACTUAL CHARACTER NAMES from the manga (e.g., "Eren", "Mikasa", "Hannes")
-        2. ONLY use generic names (Person A, Person B, Person C) if you cannot identify the actual character
-        3. MAIN TASK: Identify the SAME character with the SAME identifier across ALL pages
-        4. Use visual features to identify characters consistently (hair color, clothing, facial features)
-        5. Focus on characters who speak (have dialogue) across the pages
-        6. Ignore background characters without dialogue
-        7. DISTINGUISH between speaking characters and sound effects/onomatopoeia
-        8. Sound effects like "SNIFF", "fwOOO", "THUD" are NOT characters - they are environmental sounds
-
-        Return ONLY valid JSON in this exact format:
-        {{
-            "character_identification": {{
-                "total_unique_characters": 0,
-                "characters": [
-                    {{
-                        "name": "Character_A",
-                        "appears_in_pages": [1, 2, 3],
-                        "visual_description": "consistent visual features across all pages",
-                        "gender_hint": "male/female/unknown",
-                        "importance": "main/supporting/background"
-                    }}
-                ]
-            }},
-            "character_consistency_rules": {{
-                "Character_A": "Use this exact name for this character across all pages",
-                "Character_B": "Use this exact name for this character across all pages"
-            }}
-        }}
-
-        Focus ONLY on:
-        - Character identification across pages
-        - Visual consistency
-        - Speaking characters only
-        - Generic naming (Character_A, Character_B, etc.)
-        """
+        prompt = _CHARACTER_ID_PROMPT.format(page_count=len(page_images))
         
         try:
             logger.info(f"PASS 1: Sending all {len(page_images)} pages to Gemini for character identification...")
             
             # Send all images together using Pass 1 model (fast Flash)
-            response = self.pass1_model.generate_content([prompt] + images)
+            response_text = self._generate_text(self.pass1_model, [prompt] + images)
             
-            if not response.text:
+            if not response_text:
                 raise ValueError("No response received from Gemini in Pass 1")
             
-            # Parse response
-            response_text = response.text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            result = json.loads(response_text)
+            result = self._parse_json_response(response_text)
             
             logger.info(f"PASS 1: Character identification complete - {result['character_identification']['total_unique_characters']} characters identified")
             return result
@@ -176,20 +550,19 @@ class TwoPassHybridAnalyzer:
             logger.error(f"Error in Pass 1 character identification: {str(e)}")
             raise
     
-    def _pass2_individual_dialogue_extraction(self, page_images: List[str], character_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _pass2_individual_dialogue_extraction(self, page_images: List[bytes], character_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         PASS 2: Process each page individually with character context for accurate dialogue
         
         Args:
-            page_images: List of image paths for all pages in the scene
+            page_images: Encoded images for all pages in the scene
             character_context: Character identification from Pass 1
             
         Returns:
             List of individual page analyses with accurate dialogue
         """
         
-        # Extract character consistency rules
-        character_rules = character_context.get("character_consistency_rules", {})
+        # Extract character list
         character_list = character_context.get("character_identification", {}).get("characters", [])
         
         # Build character context string for the prompt
@@ -203,144 +576,632 @@ class TwoPassHybridAnalyzer:
         
         character_context_str += "\nCRITICAL: Use these EXACT character names when they appear on pages.\n"
         
-        individual_analyses = []
+        # The instructions are identical for every page of the scene, so they are sent once
+        # as a (cached) system instruction and each request only names its page
+        page_model = ContextCachedModel(
+            self.pass2_model_name,
+            _PAGE_ANALYSIS_PROMPT.format(page_number="N", character_context=character_context_str),
+            use_cache=self.use_context_cache
+        )
+        context_key = hashlib.blake2b(character_context_str.encode("utf-8"), digest_size=16).hexdigest()
+        try:
+            individual_analyses = asyncio.run(self._analyze_pages_concurrently(page_model, page_images, context_key))
+        finally:
+            page_model.delete()
         
-        for i, image_path in enumerate(page_images):
-            page_number = i + 1
-            logger.info(f"PASS 2: Analyzing page {page_number}/{len(page_images)}: {Path(image_path).name}")
+        logger.info(f"PASS 2: Individual dialogue extraction complete for {len(page_images)} pages")
+        return individual_analyses
+    
+    async def _analyze_pages_concurrently(self, page_model: ContextCachedModel, page_images: List[bytes], context_key: str) -> List[Dict[str, Any]]:
+        """
+        Run Pass 2 page requests concurrently, bounded by max_concurrency
+        
+        Identical page images (repeated title or chapter splash pages) are only
+        analyzed once per character context; duplicates reuse that analysis. With a
+        cache directory, pages analyzed in earlier runs are reused as well.
+        
+        Args:
+            page_model: Pass 2 model holding the scene instructions
+            page_images: Encoded images for all pages in the scene
+            context_key: Digest of the character context the instructions were built from
             
-            page_analysis = self._analyze_single_page_with_context(
-                image_path, page_number, character_context_str, character_rules
-            )
-            individual_analyses.append(page_analysis)
+        Returns:
+            List of page analyses in page order
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        total_pages = len(page_images)
+        batch_size = self.pages_per_request
+        log_info = logger.isEnabledFor(logging.INFO)
         
-        logger.info(f"PASS 2: Individual dialogue extraction complete for {len(page_images)} pages")
+        # First occurrence of every page image that has not been analyzed yet
+        page_keys = [(self._image_digest(image_data), context_key) for image_data in page_images]
+        pending: Dict[Tuple[str, str], Tuple[int, bytes]] = {}
+        reused: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for page_number, (page_key, image_data) in enumerate(zip(page_keys, page_images), 1):
+            if page_key in pending or page_key in reused:
+                continue
+            cached_analysis = self._get_page_analysis(page_key)
+            if cached_analysis is not None:
+                reused[page_key] = cached_analysis
+            else:
+                pending[page_key] = (page_number, image_data)
+        
+        if len(pending) < total_pages:
+            logger.info(f"PASS 2: Reusing analyses for {total_pages - len(pending)} repeated or previously analyzed pages")
+        
+        loop = asyncio.get_running_loop()
+        # The Gemini client is blocking, so each request runs in a worker thread. The pool is sized to
+        # max_concurrency; the shared default executor can have fewer threads than that on small machines
+        request_pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="pass2-request")
+        
+        async def analyze_batch(pages: List[Tuple[int, bytes]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                if log_info:
+                    logger.info("PASS 2: Analyzing pages %s/%d", ", ".join(str(page_number) for page_number, _ in pages), total_pages)
+                if len(pages) == 1:
+                    page_analysis = await loop.run_in_executor(
+                        request_pool, self._analyze_single_page_with_context,
+                        page_model, pages[0][1], pages[0][0]
+                    )
+                    return [page_analysis]
+                return await loop.run_in_executor(
+                    request_pool, self._analyze_page_batch_with_context,
+                    page_model, [image_data for _, image_data in pages], [page_number for page_number, _ in pages]
+                )
+        
+        pending_pages = list(pending.values())
+        page_results: List[Optional[Dict[str, Any]]] = [None] * len(pending_pages)
+        try:
+            if self.use_batch_api and len(pending_pages) >= _BATCH_API_MIN_PAGES:
+                # Half-price batch job; pages it does not answer go through real-time requests below
+                stop_polling = threading.Event()
+                try:
+                    page_results = await loop.run_in_executor(
+                        request_pool, self._analyze_pages_with_batch_api, page_model.system_instruction,
+                        pending_pages, stop_polling
+                    )
+                except BaseException:
+                    # Interrupted (Ctrl+C, cancelled task): the polling thread cannot be killed, so tell
+                    # it to stop and cancel its jobs
+                    stop_polling.set()
+                    raise
+            
+            # gather keeps results in page order regardless of completion order
+            remaining_pages = [page for page, page_result in zip(pending_pages, page_results) if page_result is None]
+            batch_results = await asyncio.gather(*(
+                analyze_batch(remaining_pages[start:start + batch_size])
+                for start in range(0, len(remaining_pages), batch_size)
+            ))
+        finally:
+            request_pool.shutdown(wait=False)
+        
+        realtime_results = iter([page_analysis for batch in batch_results for page_analysis in batch])
+        page_results = [page_result if page_result is not None else next(realtime_results) for page_result in page_results]
+        fresh_analyses = dict(zip(pending, page_results))
+        for page_key, page_analysis in fresh_analyses.items():
+            if page_analysis.get("scene") != _FAILED_SCENE:
+                self._store_page_analysis(page_key, page_analysis)
+        
+        individual_analyses = []
+        for page_number, page_key in enumerate(page_keys, 1):
+            page_analysis = fresh_analyses.get(page_key)
+            if page_analysis is None or pending[page_key][0] != page_number:
+                page_analysis = copy.deepcopy(fresh_analyses.get(page_key) or reused[page_key])
+                page_analysis["page_number"] = page_number
+            individual_analyses.append(page_analysis)
         return individual_analyses
     
-    def _analyze_single_page_with_context(self, image_path: str, page_number: int, character_context: str, character_rules: Dict[str, str]) -> Dict[str, Any]:
+    def _page_cache_key(self, page_key: Tuple[str, str]) -> str:
+        """
+        Disk cache key of a Pass 2 page analysis
+        
+        Args:
+            page_key: (image digest, character context digest)
+            
+        Returns:
+            Cache key that also covers the analysis config
+        """
+        return make_cache_key("page_analysis", self.analysis_config_digest, *page_key)
+    
+    def _get_page_analysis(self, page_key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Look up a successful Pass 2 analysis in memory, then on disk
+        
+        Args:
+            page_key: (image digest, character context digest)
+            
+        Returns:
+            Cached page analysis, or None if the page has not been analyzed
+        """
+        page_analysis = self._page_analysis_cache.get(page_key)
+        if page_analysis is not None:
+            self._page_analysis_cache.move_to_end(page_key)
+            return page_analysis
+        
+        if self._result_cache is not None:
+            page_analysis = self._result_cache.get(self._page_cache_key(page_key))
+            if page_analysis is not None:
+                self._remember_page_analysis(page_key, page_analysis)
+        return page_analysis
+    
+    def _store_page_analysis(self, page_key: Tuple[str, str], page_analysis: Dict[str, Any]):
+        """
+        Keep a successful Pass 2 analysis in memory and, when enabled, on disk
+        
+        Args:
+            page_key: (image digest, character context digest)
+            page_analysis: Analysis of the page
+        """
+        self._remember_page_analysis(page_key, page_analysis)
+        if self._result_cache is not None:
+            self._result_cache.set(self._page_cache_key(page_key), page_analysis)
+    
+    def _remember_page_analysis(self, page_key: Tuple[str, str], page_analysis: Dict[str, Any]):
+        """
+        Add a page analysis to the in-memory cache, evicting the least recently used one when full
+        
+        Args:
+            page_key: (image digest, character context digest)
+            page_analysis: Analysis of the page
+        """
+        # A copy, callers go on to set the page number and other fields on the analysis they passed in
+        self._page_analysis_cache[page_key] = copy.deepcopy(page_analysis)
+        self._page_analysis_cache.move_to_end(page_key)
+        if len(self._page_analysis_cache) > _PAGE_CACHE_SIZE:
+            self._page_analysis_cache.popitem(last=False)
+    
+    def _analyze_single_page_with_context(self, page_model: ContextCachedModel, image_data: bytes, page_number: int) -> Dict[str, Any]:
         """
         Analyze a single page with character context for accurate dialogue extraction
         
         Args:
-            image_path: Path to the image file
+            page_model: Pass 2 model holding the scene instructions and character context
+            image_data: Encoded page image
             page_number: Page number
-            character_context: Character identification context from Pass 1
-            character_rules: Character consistency rules
             
         Returns:
             Page analysis with accurate dialogue
         """
         
-        # Load image
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
+        # Load image (already uploaded by Pass 1 when the Files API is enabled)
+        image_part = self._get_image_part(image_data)
         
-        # Create focused prompt for single page with character context
-        prompt = f"""
-        Analyze this manga page (page {page_number}) and extract dialogue information using the character context provided.
-
-        {character_context}
-
-        CRITICAL SPEAKER IDENTIFICATION RULES:
-        1. CAREFULLY examine each speech bubble to identify WHO is actually speaking
-        2. Look at the speech bubble's position, tail direction, and visual connection to characters
-        3. PAY SPECIAL ATTENTION to speech bubble tails - they point to the character who is speaking
-        4. If multiple speech bubbles are connected or sequential, they likely belong to the SAME speaker
-        5. Use the EXACT character names from the context above (try to identify actual names like "Eren", "Mikasa", "Hannes")
-        6. Extract ALL dialogue text from speech bubbles in reading order (right to left, top to bottom)
-        7. Provide detailed emotion analysis with confidence levels for each dialogue line
-        8. Include visual cues (facial expressions, body language) for emotion detection
-        9. Provide ambient context (environmental sounds, atmosphere)
-        10. Focus on speaking characters only
-        11. DOUBLE-CHECK speaker attribution by examining speech bubble connections to characters
-
-        SOUND EFFECTS AND ONOMATOPOEIA RULES:
-        1. Onomatopoeia (sound effects) like "SNIFF", "fwOOO", "THUD", "CRASH" should be treated as SOUND EFFECTS
-        2. Sound effects should be placed in [brackets] format: "[SNIFF]", "[fwOOO]", "[THUD]"
-        3. Sound effects should have speaker: "Sound Effect" and NOT be attributed to characters
-        4. Only actual spoken dialogue should be attributed to characters
-        5. Distinguish between character dialogue and environmental sound effects
-
-        Emotion categories to consider:
-        - happy, excited, joyful, cheerful, delighted
-        - sad, depressed, melancholy, tearful, sorrowful
-        - angry, furious, enraged, frustrated, irritated
-        - surprised, shocked, amazed, startled, bewildered
-        - fearful, scared, terrified, anxious, worried
-        - calm, peaceful, serene, relaxed, composed
-        - confused, puzzled, bewildered, uncertain
-        - determined, resolute, focused, serious
-        - sarcastic, mocking, dismissive, condescending
-        - curious, interested, questioning, intrigued
-        - embarrassed, ashamed, guilty, sheepish
-        - proud, confident, arrogant, smug
-        - neutral, expressionless, blank, stoic
-
-        Return ONLY valid JSON in this exact format:
-        {{
-            "page_number": {page_number},
-            "scene": "brief description of what's happening",
-            "speaking_characters": [
-                {{"name": "Character_A", "expression": "detailed emotional state", "visual_cues": "facial expression, body language", "dialogue_count": number_of_speech_bubbles}}
-            ],
-            "dialogue_order": [
-                {{"speaker": "Character_A", "text": "exact dialogue text", "emotion": "primary emotion", "confidence": "high/medium/low", "visual_analysis": "what you see in the image"}},
-                {{"speaker": "Sound Effect", "text": "[SNIFF]", "emotion": "neutral", "confidence": "high", "visual_analysis": "onomatopoeia sound effect"}}
-            ],
-            "ambient": "environmental context and atmosphere"
-        }}
-
-        EXAMPLES OF CORRECT FORMATTING:
-        - Character dialogue: {{"speaker": "Eren", "text": "I will destroy all Titans!", "emotion": "determined"}}
-        - Sound effects: {{"speaker": "Sound Effect", "text": "[SNIFF]", "emotion": "neutral"}}
-        - Sound effects: {{"speaker": "Sound Effect", "text": "[fwOOO]", "emotion": "neutral"}}
-        - Sound effects: {{"speaker": "Sound Effect", "text": "[THUD]", "emotion": "neutral"}}
-
-        Focus on:
-        - CAREFULLY identifying WHO is speaking in each speech bubble (examine bubble position and tail direction)
-        - Using EXACT character names from context (prefer actual names like Eren, Mikasa, Hannes)
-        - Separating character dialogue from sound effects/onomatopoeia
-        - Putting sound effects in [brackets] format with speaker: "Sound Effect"
-        - Accurate dialogue extraction from speech bubbles in right-to-left reading order
-        - Detailed emotion detection based on visual cues
-        - Comprehensive analysis for audio narration generation
-        """
+        # Character context is part of the scene instructions, the request only names the page
+        prompt = _PAGE_REQUEST_PROMPT.format(page_number=page_number)
         
         try:
             # Send single page using Pass 2 model (powerful Pro)
-            response = self.pass2_model.generate_content([
-                prompt,
-                {
-                    "mime_type": "image/png",
-                    "data": image_data
-                }
-            ])
-            
-            if not response.text:
-                raise ValueError(f"No response received for page {page_number}")
+            response_text = self._generate_text(page_model, [prompt, image_part], _page_response_schema())
             
-            # Parse response
-            response_text = response.text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
+            if not response_text:
+                raise ValueError(f"No response received for page {page_number}")
             
-            result = json.loads(response_text)
+            result = self._parse_page_analyses(response_text)
+            result["page_number"] = page_number
             
-            logger.info(f"✓ Page {page_number} analyzed: {len(result.get('dialogue_order', []))} dialogue lines")
+            logger.info("✓ Page %d analyzed: %d dialogue lines", page_number, len(result.get("dialogue_order", [])))
             return result
             
         except Exception as e:
             logger.error(f"Error analyzing page {page_number}: {str(e)}")
-            # Return empty analysis for failed pages
-            return {
-                "page_number": page_number,
-                "scene": "Analysis failed",
-                "speaking_characters": [],
-                "dialogue_order": [],
-                "ambient": ""
-            }
+            return self._failed_page_analysis(page_number)
+    
+    def _analyze_page_batch_with_context(self, page_model: ContextCachedModel, page_images: List[bytes], page_numbers: List[int]) -> List[Dict[str, Any]]:
+        """
+        Analyze several pages in a single Pass 2 request
+        
+        Args:
+            page_model: Pass 2 model holding the scene instructions and character context
+            page_images: Encoded page images, in page order
+            page_numbers: Page number of each image
+            
+        Returns:
+            Page analyses in page order
+        """
+        prompt = _PAGE_BATCH_PREAMBLE.format(
+            page_count=len(page_images),
+            page_numbers=", ".join(map(str, page_numbers))
+        )
+        
+        contents = [prompt]
+        contents.extend(self._get_image_part(image_data) for image_data in page_images)
+        
+        try:
+            response_text = self._generate_text(page_model, contents, _page_response_schema(batch=True))
+            
+            if not response_text:
+                raise ValueError(f"No response received for pages {page_numbers[0]}-{page_numbers[-1]}")
+            
+            results = self._parse_page_analyses(response_text, batch=True)
+            if not isinstance(results, list) or len(results) != len(page_images):
+                raise ValueError(f"Expected a JSON array of {len(page_images)} page analyses")
+            
+            for page_number, result in zip(page_numbers, results):
+                result["page_number"] = page_number
+                logger.info("✓ Page %d analyzed: %d dialogue lines", page_number, len(result.get("dialogue_order", [])))
+            return results
+            
+        except THROTTLING_ERRORS as e:
+            # Still throttled after every retry; more requests would only make it worse
+            logger.error(f"Error analyzing pages {page_numbers[0]}-{page_numbers[-1]}: {str(e)}")
+            return [self._failed_page_analysis(page_number) for page_number in page_numbers]
+            
+        except Exception as e:
+            # Usually a malformed or truncated multi-page answer, which single pages rarely produce
+            logger.warning(f"Batch analysis of pages {page_numbers[0]}-{page_numbers[-1]} failed ({str(e)}), "
+                           f"retrying one page per request")
+            return [self._analyze_single_page_with_context(page_model, image_data, page_number)
+                    for image_data, page_number in zip(page_images, page_numbers)]
+    
+    def _generate_text(self, model: Any, contents: List[Any], response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Send a streaming Gemini request and collect the response text, backing off and retrying when rate limited
+        
+        Streaming lets chunks be collected while the rest of the response is still being generated.
+        
+        Args:
+            model: GenerativeModel or ContextCachedModel to call
+            contents: Request contents
+            response_schema: Optional schema Gemini must follow, so the JSON always has the expected shape
+            
+        Returns:
+            Full response text (empty if the model returned nothing)
+        """
+        generation_config = _JSON_GENERATION_CONFIG
+        if response_schema is not None:
+            generation_config = {**_JSON_GENERATION_CONFIG, "response_schema": response_schema}
+        
+        def request() -> str:
+            response = model.generate_content(contents, stream=True, generation_config=generation_config)
+            chunks = []
+            for chunk in response:
+                if chunk.parts:
+                    chunks.append(chunk.text)
+            return "".join(chunks)
+        
+        tokens = estimate_tokens(contents) if self._pacer is not None else 0
+        return call_with_retry(request, self.max_retries, self._pacer, tokens)
+    
+    def _load_pages(self, page_images: Iterable[Union[str, Image.Image, bytes]],
+                    upload_pool: Optional[ThreadPoolExecutor] = None) -> List[bytes]:
+        """
+        Encode the pages of a scene for Gemini, skipping missing image files
+        
+        Args:
+            page_images: Image paths, PIL Images or bytes already encoded in image_format, in page order
+            upload_pool: Optional executor that uploads each page as soon as it is encoded
+            
+        Returns:
+            Encoded images in page order
+        """
+        encoded_pages = []
+        
+        def collect(future):
+            image_data = future.result()
+            if image_data is not None:
+                encoded_pages.append(image_data)
+                if upload_pool is not None:
+                    upload_pool.submit(self._get_image_part, image_data)
+        
+        # Resizing and encoding release the GIL, so a few pages are encoded side by side while the
+        # page iterator keeps rasterizing; futures are collected in order to keep pages in sequence
+        with ThreadPoolExecutor(max_workers=_ENCODE_PREFETCH, thread_name_prefix="page-encode") as encode_pool:
+            in_flight = deque()
+            for page in page_images:
+                in_flight.append(encode_pool.submit(self._load_page, page))
+                if len(in_flight) >= _ENCODE_PREFETCH:
+                    collect(in_flight.popleft())
+            while in_flight:
+                collect(in_flight.popleft())
+        return encoded_pages
+    
+    def _load_page(self, page: Union[str, Image.Image, bytes]) -> Optional[bytes]:
+        """
+        Encode one page for Gemini
+        
+        Args:
+            page: Image path, PIL Image or bytes already encoded in image_format
+            
+        Returns:
+            Encoded image, or None if the image file does not exist
+        """
+        if isinstance(page, bytes):
+            return page
+        if isinstance(page, Image.Image):
+            return self._encode_image(page)
+        
+        # One read into memory serves both the format check and the decode, without a separate stat
+        try:
+            file_data = Path(page).read_bytes()
+        except FileNotFoundError:
+            logger.warning("Image not found: %s", page)
+            return None
+        
+        with Image.open(io.BytesIO(file_data)) as image:
+            # Files already in the upload format and small enough are sent as-is instead of being re-encoded
+            if image.format == self._image_format and self._fits_image_dimension(image):
+                image_data = file_data
+            else:
+                if not self._fits_image_dimension(image):
+                    # JPEG files decode directly at 1/2, 1/4 or 1/8 scale (never below the requested size),
+                    # which halves load time for 300 DPI pages; other formats ignore this
+                    scale = self.max_image_dimension / max(image.size)
+                    image.draft(image.mode, (round(image.width * scale), round(image.height * scale)))
+                image_data = self._encode_image(image)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Loaded: %s", Path(page).name)
+        return image_data
+    
+    def _fits_image_dimension(self, image: Image.Image) -> bool:
+        """
+        Check whether an image is within max_image_dimension
+        
+        Args:
+            image: Page image (only the header needs to be loaded)
+            
+        Returns:
+            True if the image does not need to be shrunk
+        """
+        return not self.max_image_dimension or max(image.size) <= self.max_image_dimension
+    
+    def _encode_image(self, image: Image.Image) -> bytes:
+        """
+        Encode a page as JPEG (or WebP), shrunk to max_image_dimension
+        
+        Gemini resizes large inputs itself, so full 300 DPI pages only cost upload
+        bandwidth. Black-and-white pages are sent single-channel, which is
+        noticeably smaller. The caller's image is left untouched.
+        
+        Args:
+            image: Page image
+            
+        Returns:
+            Encoded bytes to send
+        """
+        if not self._fits_image_dimension(image):
+            image = ImageOps.contain(image, (self.max_image_dimension, self.max_image_dimension), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if image.mode == "RGB" and _is_grayscale(image):
+            image = image.convert("L")
+        
+        buffer = io.BytesIO()
+        if self._image_format == "WEBP":
+            image.save(buffer, "WEBP", quality=self.jpeg_quality, method=4)
+        else:
+            image.save(buffer, "JPEG", quality=self.jpeg_quality, optimize=True)
+        return buffer.getvalue()
+    
+    def _image_digest(self, image_data: bytes) -> str:
+        """
+        Hash an encoded page image
+        
+        Args:
+            image_data: Encoded page image
+            
+        Returns:
+            Hex digest of the image bytes
+        """
+        return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+    
+    def _get_image_part(self, image_data: bytes) -> Any:
+        """
+        Get the Gemini content part for a page image
+        
+        With the Files API enabled each distinct image is uploaded once and the
+        returned handle is reused by later requests (Pass 1 and Pass 2 send the
+        same pages). Falls back to inline bytes if the upload fails.
+        
+        Args:
+            image_data: Encoded page image
+            
+        Returns:
+            Uploaded file handle or inline image dict
+        """
+        if not self.use_file_api:
+            return {"mime_type": self._mime_type, "data": image_data}
+        
+        digest = self._image_digest(image_data)
+        with self._file_cache_lock:
+            cached = self._file_cache.get(digest)
+            if cached is not None:
+                return cached[0]
+            upload = self._file_uploads.get(digest)
+            uploading = upload is None
+            if uploading:
+                upload = self._file_uploads[digest] = Future()
+        
+        if uploading:
+            uploaded_file = None
+            try:
+                uploaded_file = genai.upload_file(path=io.BytesIO(image_data), mime_type=self._mime_type)
+            except Exception as e:
+                logger.warning(f"Upload failed for page image {digest}, sending inline: {e}")
+            finally:
+                with self._file_cache_lock:
+                    if uploaded_file is not None:
+                        self._file_cache[digest] = (uploaded_file, time.monotonic())
+                    del self._file_uploads[digest]
+                upload.set_result(uploaded_file)
+        
+        # A failed upload is retried by the next request, the ones waiting on it now go inline
+        uploaded_file = upload.result()
+        if uploaded_file is None:
+            return {"mime_type": self._mime_type, "data": image_data}
+        return uploaded_file
+    
+    def purge_file_cache(self, max_age: float = 0.0) -> int:
+        """
+        Delete uploaded page images older than max_age seconds
+        
+        Args:
+            max_age: Minimum age in seconds of uploads to delete (0 deletes all)
+            
+        Returns:
+            Number of deleted uploads
+        """
+        now = time.monotonic()
+        with self._file_cache_lock:
+            expired = [digest for digest, (_, uploaded_at) in self._file_cache.items()
+                       if now - uploaded_at >= max_age]
+            expired_files = [self._file_cache.pop(digest)[0] for digest in expired]
+        
+        for uploaded_file in expired_files:
+            try:
+                genai.delete_file(uploaded_file.name)
+            except Exception as e:
+                logger.warning(f"Failed to delete uploaded file {uploaded_file.name}: {e}")
+        
+        if expired_files:
+            logger.info(f"Deleted {len(expired_files)} uploaded page images")
+        return len(expired_files)
+    
+    def _parse_json_response(self, response_text: str) -> Any:
+        """
+        Parse a Gemini JSON response, stripping markdown code fences and surrounding prose
+        
+        Args:
+            response_text: Raw response text
+            
+        Returns:
+            Parsed JSON value
+        """
+        response_text = _extract_json_text(response_text)
+        
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers handle both alike
+        return orjson.loads(response_text) if orjson is not None else json.loads(response_text)
+    
+    def _parse_page_analyses(self, response_text: str, batch: bool = False) -> Any:
+        """
+        Parse a Pass 2 response, validating it against the page analysis schema when msgspec is installed
+        
+        Args:
+            response_text: Raw response text
+            batch: Whether the response is an array of page analyses
+            
+        Returns:
+            Page analysis dict, or list of them for batches
+        """
+        if msgspec is None:
+            return self._parse_json_response(response_text)
+        
+        response_text = _extract_json_text(response_text)
+        
+        decoder = _PAGE_BATCH_DECODER if batch else _PAGE_DECODER
+        return msgspec.to_builtins(decoder.decode(response_text))
+    
+    def _analyze_pages_with_batch_api(self, system_instruction: str, pages: List[Tuple[int, bytes]],
+                                      stop_polling: Optional[threading.Event] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Analyze pages through Gemini Batch API jobs, one request per page
+        
+        Jobs still running when this returns (timeout, error or stop_polling) are cancelled.
+        
+        Args:
+            system_instruction: Pass 2 instructions with the character context of the scene
+            pages: (page number, encoded image) pairs
+            stop_polling: Optional event that abandons the jobs as soon as it is set
+            
+        Returns:
+            Page analyses in the order given, None for pages the jobs did not answer
+        """
+        if self._batch_client is None:
+            self._batch_client = google_genai.Client(api_key=self.api_key)
+        
+        config = {
+            "system_instruction": system_instruction,
+            **_JSON_GENERATION_CONFIG,
+            "response_schema": _page_response_schema()
+        }
+        
+        # Split the pages into jobs that stay under the inline request size limit
+        jobs: List[Tuple[Any, List[Tuple[int, bytes]]]] = []
+        job_pages: List[Tuple[int, bytes]] = []
+        job_bytes = 0
+        for page in pages:
+            if job_pages and job_bytes + len(page[1]) > _BATCH_API_MAX_INLINE_BYTES:
+                jobs.append((None, job_pages))
+                job_pages, job_bytes = [], 0
+            job_pages.append(page)
+            job_bytes += len(page[1])
+        jobs.append((None, job_pages))
+        
+        if stop_polling is None:
+            stop_polling = threading.Event()
+        
+        results: Dict[int, Dict[str, Any]] = {}
+        try:
+            for index, (_, job_pages) in enumerate(jobs):
+                requests = [{
+                    "contents": [{"role": "user", "parts": [
+                        {"text": _PAGE_REQUEST_PROMPT.format(page_number=page_number)},
+                        {"inline_data": {"mime_type": self._mime_type, "data": image_data}}
+                    ]}],
+                    "config": config
+                } for page_number, image_data in job_pages]
+                job = self._batch_client.batches.create(model=self.pass2_model_name, src=requests)
+                jobs[index] = (job, job_pages)
+                logger.info(f"PASS 2: Submitted batch job {job.name} for {len(job_pages)} pages")
+            
+            # Jobs usually take minutes, so polling starts slow and backs off further
+            deadline = time.monotonic() + self.batch_api_timeout
+            poll_interval = 10.0
+            for index, (job, job_pages) in enumerate(jobs):
+                while job.state.name not in _BATCH_JOB_DONE_STATES:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Batch job {job.name} did not finish in {self.batch_api_timeout:.0f}s")
+                    if stop_polling.wait(min(poll_interval, remaining)):
+                        raise InterruptedError(f"Stopped waiting for batch job {job.name}")
+                    poll_interval = min(poll_interval * 1.5, 120.0)
+                    job = self._batch_client.batches.get(name=job.name)
+                jobs[index] = (job, job_pages)
+                
+                if job.state.name != "JOB_STATE_SUCCEEDED":
+                    logger.warning(f"Batch job {job.name} ended in {job.state.name}")
+                    continue
+                
+                for (page_number, _), inlined_response in zip(job_pages, job.dest.inlined_responses):
+                    try:
+                        if inlined_response.error:
+                            raise ValueError(str(inlined_response.error))
+                        result = self._parse_page_analyses(inlined_response.response.text)
+                        result["page_number"] = page_number
+                        results[page_number] = result
+                    except Exception as e:
+                        logger.warning(f"Batch response for page {page_number} unusable ({str(e)}), retrying in real time")
+        
+        except Exception as e:
+            logger.error(f"Batch API analysis failed, falling back to real-time requests: {str(e)}")
+        finally:
+            # Stop paying for jobs nobody will read, whatever ended the wait
+            for job, _ in jobs:
+                if job is not None and job.state.name not in _BATCH_JOB_DONE_STATES:
+                    try:
+                        self._batch_client.batches.cancel(name=job.name)
+                    except Exception as cancel_error:
+                        logger.warning(f"Failed to cancel batch job {job.name}: {cancel_error}")
+        
+        logger.info(f"PASS 2: Batch API answered {len(results)}/{len(pages)} pages")
+        return [results.get(page_number) for page_number, _ in pages]
+    
+    def _failed_page_analysis(self, page_number: int) -> Dict[str, Any]:
+        """
+        Build the empty analysis returned for pages that failed
+        
+        Args:
+            page_number: Page number
+            
+        Returns:
+            Empty page analysis
+        """
+        return {
+            "page_number": page_number,
+            "scene": _FAILED_SCENE,
+            "speaking_characters": [],
+            "dialogue_order": [],
+            "ambient": ""
+        }
     
     def _build_final_scene_analysis(self, individual_analyses: List[Dict[str, Any]], character_context: Dict[str, Any], scene_id: str) -> Dict[str, Any]:
         """
@@ -360,15 +1221,32 @@ class TwoPassHybridAnalyzer:
         characters = character_identification.get("characters", [])
         
         # Build character consistency data
+        total_pages = max(len(individual_analyses), 1)
         character_consistency = {}
         for char in characters:
             char_name = char.get("name", "")
+            pages_appeared = char.get("appears_in_pages", [])
+            appearance_count = len(set(pages_appeared))
+            appearance_percentage = 100.0 * appearance_count / total_pages
+            
+            # Models sometimes echo the "main/supporting/background" placeholder or leave the field out;
+            # fall back to the share of pages the character appears on
+            importance = str(char.get("importance", "")).lower()
+            if importance not in _CHARACTER_IMPORTANCE:
+                if appearance_percentage >= 70.0:
+                    importance = "main"
+                elif appearance_percentage >= 30.0:
+                    importance = "supporting"
+                else:
+                    importance = "background"
+            
             character_consistency[char_name] = {
-                "appearance_count": len(char.get("appears_in_pages", [])),
-                "pages_appeared": char.get("appears_in_pages", []),
+                "appearance_count": appearance_count,
+                "appearance_percentage": round(appearance_percentage, 1),
+                "pages_appeared": pages_appeared,
                 "visual_description": char.get("visual_description", ""),
                 "gender_hint": char.get("gender_hint", "unknown"),
-                "importance": char.get("importance", "background")
+                "importance": importance
             }
         
         # Generate scene summary
@@ -407,9 +1285,12 @@ class TwoPassHybridAnalyzer:
             Scene summary
         """
         
-        # Find main characters (appear in multiple pages)
-        main_characters = [char for char, data in character_consistency.items() if data["importance"] == "main"]
-        supporting_characters = [char for char, data in character_consistency.items() if data["importance"] == "supporting"]
+        # Bucket characters by importance in one pass
+        characters_by_importance = {"main": [], "supporting": [], "background": []}
+        for char, data in character_consistency.items():
+            characters_by_importance[data["importance"]].append(char)
+        main_characters = characters_by_importance["main"]
+        supporting_characters = characters_by_importance["supporting"]
         
         # Extract scene descriptions
         scene_descriptions = [page.get("scene", "") for page in individual_analyses if page.get("scene")]
@@ -433,14 +1314,9 @@ class TwoPassHybridAnalyzer:
             Combined ambient context
         """
         
-        ambient_contexts = [page.get("ambient", "") for page in individual_analyses if page.get("ambient")]
-        
-        if ambient_contexts:
-            # Combine unique ambient contexts
-            unique_contexts = list(set(ambient_contexts))
-            return " | ".join(unique_contexts)
-        
-        return ""
+        # Combine unique ambient contexts in one pass, keeping the order they first appear in
+        unique_contexts = dict.fromkeys(page["ambient"] for page in individual_analyses if page.get("ambient"))
+        return " | ".join(unique_contexts)
     
     def get_character_summary(self, scene_analysis: Dict[str, Any]) -> str:
         """
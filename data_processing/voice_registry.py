@@ -5,14 +5,23 @@ Manages character-to-voice mapping for consistent voice assignment across pages
 
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import threading
+from typing import Dict, List, Any, Optional, Iterable
 from pathlib import Path
 import os
 
+from shared_json_file import locked_file, read_json_file, write_json_atomic
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Name hints used to infer a voice when no character type is given, compiled
+# once so each lookup is a single pass over the name
+NARRATOR_NAME_RE = re.compile(r"narrator|narration|sound effect")
+FEMALE_NAME_RE = re.compile(r"mikasa|mrs|miss|lady|woman|girl|female|mother|sister|daughter")
+
 
 class VoiceRegistry:
     """Manages persistent voice assignments for characters"""
@@ -27,6 +36,14 @@ class VoiceRegistry:
         self.registry_file = Path(registry_file)
         self.registry = self._load_registry()
         
+        # Memoized get_voice_statistics result, cleared whenever assignments change. Enhancement and
+        # voice assignment run on different threads, so assignments, the memo and saves share a lock
+        self._statistics_cache: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        
+        # Characters reassigned or imported since the last save, which win over the saved file when merging
+        self._updated_characters: set = set()
+        
         # ElevenLabs voice IDs - Male voices
         self.male_voices = [
             "UgBBYS2sOqTuMpoF3BR0",
@@ -49,9 +66,7 @@ class VoiceRegistry:
         # Narrator voice ID (special voice for all narrators)
         self.narrator_voice_id = "asDeXBMC8hUkhqqL7agO"
         
-        # Voice assignment tracking
-        self.male_voice_index = 0
-        self.female_voice_index = 0
+        self._sync_voice_indices()
         
         logger.info(f"Voice Registry initialized with {len(self.registry)} existing assignments")
     
@@ -59,6 +74,7 @@ class VoiceRegistry:
         """Load voice registry from file"""
         try:
             if self.registry_file.exists():
+                # Files are replaced atomically, so this never sees another process's partial write
                 with open(self.registry_file, 'r', encoding='utf-8') as f:
                     registry = json.load(f)
                 logger.info(f"Loaded voice registry from {self.registry_file}")
@@ -70,16 +86,56 @@ class VoiceRegistry:
             logger.error(f"Error loading voice registry: {e}")
             return {"characters": {}, "voice_usage": {}}
     
+    def _sync_voice_indices(self):
+        """
+        Continue the voice rotation after the voices already assigned, so new characters do not
+        start again from the voices the first characters already have
+        """
+        assigned_voices = [character.get("voice_id") for character in self.registry["characters"].values()]
+        male_voices = set(self.male_voices)
+        female_voices = set(self.female_voices)
+        self.male_voice_index = sum(voice_id in male_voices for voice_id in assigned_voices)
+        self.female_voice_index = sum(voice_id in female_voices for voice_id in assigned_voices)
+    
     def _save_registry(self):
-        """Save voice registry to file"""
+        """Save voice registry to file, merging assignments other processes saved in the meantime"""
         try:
             self.registry_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
-                json.dump(self.registry, f, indent=2, ensure_ascii=False)
+            with locked_file(self.registry_file):
+                saved_registry = read_json_file(self.registry_file)
+                if saved_registry:
+                    self._merge_saved_registry(saved_registry)
+                write_json_atomic(self.registry_file, self.registry)
             logger.info(f"Voice registry saved to {self.registry_file}")
         except Exception as e:
             logger.error(f"Error saving voice registry: {e}")
     
+    def _merge_saved_registry(self, saved_registry: Dict[str, Any]):
+        """
+        Take over assignments from the saved registry (callers hold the lock)
+        
+        A character assigned in another process first keeps that voice, so every process
+        ends up using the same one; only reassignments and imports made here override it.
+        
+        Args:
+            saved_registry: Registry currently on disk
+        """
+        characters = self.registry["characters"]
+        for character_name, character in saved_registry.get("characters", {}).items():
+            if character_name not in self._updated_characters:
+                characters[character_name] = character
+        self._updated_characters.clear()
+        
+        # Usage statistics follow the merged assignments
+        voice_usage = {}
+        for character_name, character in characters.items():
+            usage = voice_usage.setdefault(character["voice_id"], {"count": 0, "characters": []})
+            usage["count"] += 1
+            usage["characters"].append(character_name)
+        self.registry["voice_usage"] = voice_usage
+        self._statistics_cache = None
+        self._sync_voice_indices()
+    
     def assign_voice(self, character_name: str, voice_id: str = None, character_type: str = None) -> str:
         """
         Assign or retrieve voice for a character
@@ -93,16 +149,88 @@ class VoiceRegistry:
             Assigned voice ID
         """
         # Check if character already has a voice assigned
-        if character_name in self.registry["characters"]:
+        character = self.registry["characters"].get(character_name)
+        if character is not None:
+            # Hit once per speaker per page, so keep it out of the INFO log
+            logger.debug("Character '%s' already assigned voice: %s", character_name, character["voice_id"])
+            return character["voice_id"]
+        
+        with self._lock:
+            # Another thread may have assigned the character in the meantime
+            character = self.registry["characters"].get(character_name)
+            if character is not None:
+                return character["voice_id"]
+            
+            # Auto-assign voice if not specified
+            if not voice_id:
+                voice_id = self._auto_assign_voice(character_name, character_type)
+            
+            self._register_voice(character_name, voice_id, character_type)
+            
+            # Save registry; another process may have assigned the character first
+            self._save_registry()
             voice_id = self.registry["characters"][character_name]["voice_id"]
-            logger.info(f"Character '{character_name}' already assigned voice: {voice_id}")
-            return voice_id
         
-        # Auto-assign voice if not specified
-        if not voice_id:
-            voice_id = self._auto_assign_voice(character_name, character_type)
+        logger.info("Assigned voice '%s' to character '%s'", voice_id, character_name)
+        return voice_id
+    
+    def assign_voices(self, assignments: Dict[str, str]) -> int:
+        """
+        Assign voices to many characters and save the registry once
+        
+        Args:
+            assignments: Mapping of character names to voice IDs
+            
+        Returns:
+            Number of newly assigned characters
+        """
+        characters = self.registry["characters"]
+        new_assignments = 0
+        with self._lock:
+            for character_name, voice_id in assignments.items():
+                if voice_id and character_name not in characters:
+                    self._register_voice(character_name, voice_id)
+                    new_assignments += 1
+            
+            if new_assignments:
+                self._save_registry()
+        
+        logger.info("Assigned voices to %d new characters", new_assignments)
+        return new_assignments
+    
+    def assign_missing_voices(self, character_names: Iterable[str]) -> int:
+        """
+        Auto-assign voices to every character that has none yet and save the registry once
         
-        # Assign the voice
+        Args:
+            character_names: Character names to make sure are registered
+            
+        Returns:
+            Number of newly assigned characters
+        """
+        characters = self.registry["characters"]
+        new_assignments = 0
+        with self._lock:
+            for character_name in character_names:
+                if character_name and character_name not in characters:
+                    self._register_voice(character_name, self._auto_assign_voice(character_name))
+                    new_assignments += 1
+            
+            if new_assignments:
+                self._save_registry()
+                logger.info("Assigned voices to %d new characters", new_assignments)
+        return new_assignments
+    
+    def _register_voice(self, character_name: str, voice_id: str, character_type: str = None):
+        """
+        Record a voice assignment and its usage without saving (callers hold the lock)
+        
+        Args:
+            character_name: Name of the character
+            voice_id: Voice ID to assign
+            character_type: Type hint recorded with the assignment
+        """
+        self._statistics_cache = None
         self.registry["characters"][character_name] = {
             "voice_id": voice_id,
             "character_type": character_type or "unknown",
@@ -115,12 +243,6 @@ class VoiceRegistry:
         
         self.registry["voice_usage"][voice_id]["count"] += 1
         self.registry["voice_usage"][voice_id]["characters"].append(character_name)
-        
-        # Save registry
-        self._save_registry()
-        
-        logger.info(f"Assigned voice '{voice_id}' to character '{character_name}'")
-        return voice_id
     
     def _auto_assign_voice(self, character_name: str, character_type: str = None) -> str:
         """
@@ -149,11 +271,11 @@ class VoiceRegistry:
         name_lower = character_name.lower()
         
         # Narrator patterns
-        if any(keyword in name_lower for keyword in ["narrator", "narration", "sound effect"]):
+        if NARRATOR_NAME_RE.search(name_lower):
             return self.narrator_voice_id
         
         # Female name patterns
-        elif any(keyword in name_lower for keyword in ["mikasa", "mrs", "miss", "lady", "woman", "girl", "female", "mother", "sister", "daughter"]):
+        elif FEMALE_NAME_RE.search(name_lower):
             voice_id = self.female_voices[self.female_voice_index % len(self.female_voices)]
             self.female_voice_index += 1
             return voice_id
@@ -194,11 +316,14 @@ class VoiceRegistry:
         Returns:
             Dictionary with voice usage statistics
         """
-        return {
-            "total_characters": len(self.registry["characters"]),
-            "total_voices_used": len(self.registry["voice_usage"]),
-            "voice_usage": self.registry["voice_usage"].copy()
-        }
+        with self._lock:
+            if self._statistics_cache is None:
+                self._statistics_cache = {
+                    "total_characters": len(self.registry["characters"]),
+                    "total_voices_used": len(self.registry["voice_usage"]),
+                    "voice_usage": self.registry["voice_usage"].copy()
+                }
+            return dict(self._statistics_cache)
     
     def reassign_voice(self, character_name: str, new_voice_id: str):
         """
@@ -208,30 +333,33 @@ class VoiceRegistry:
             character_name: Name of the character
             new_voice_id: New voice ID to assign
         """
-        if character_name not in self.registry["characters"]:
-            logger.warning(f"Character '{character_name}' not found in registry")
-            return
-        
-        old_voice_id = self.registry["characters"][character_name]["voice_id"]
-        
-        # Update character assignment
-        self.registry["characters"][character_name]["voice_id"] = new_voice_id
-        self.registry["characters"][character_name]["last_updated"] = self._get_timestamp()
-        
-        # Update voice usage statistics
-        if old_voice_id in self.registry["voice_usage"]:
-            self.registry["voice_usage"][old_voice_id]["count"] -= 1
-            if character_name in self.registry["voice_usage"][old_voice_id]["characters"]:
-                self.registry["voice_usage"][old_voice_id]["characters"].remove(character_name)
-        
-        if new_voice_id not in self.registry["voice_usage"]:
-            self.registry["voice_usage"][new_voice_id] = {"count": 0, "characters": []}
-        
-        self.registry["voice_usage"][new_voice_id]["count"] += 1
-        self.registry["voice_usage"][new_voice_id]["characters"].append(character_name)
-        
-        # Save registry
-        self._save_registry()
+        with self._lock:
+            if character_name not in self.registry["characters"]:
+                logger.warning(f"Character '{character_name}' not found in registry")
+                return
+            
+            old_voice_id = self.registry["characters"][character_name]["voice_id"]
+            self._statistics_cache = None
+            
+            # Update character assignment
+            self._updated_characters.add(character_name)
+            self.registry["characters"][character_name]["voice_id"] = new_voice_id
+            self.registry["characters"][character_name]["last_updated"] = self._get_timestamp()
+            
+            # Update voice usage statistics
+            if old_voice_id in self.registry["voice_usage"]:
+                self.registry["voice_usage"][old_voice_id]["count"] -= 1
+                if character_name in self.registry["voice_usage"][old_voice_id]["characters"]:
+                    self.registry["voice_usage"][old_voice_id]["characters"].remove(character_name)
+            
+            if new_voice_id not in self.registry["voice_usage"]:
+                self.registry["voice_usage"][new_voice_id] = {"count": 0, "characters": []}
+            
+            self.registry["voice_usage"][new_voice_id]["count"] += 1
+            self.registry["voice_usage"][new_voice_id]["characters"].append(character_name)
+            
+            # Save registry
+            self._save_registry()
         
         logger.info(f"Reassigned character '{character_name}' from '{old_voice_id}' to '{new_voice_id}'")
     
@@ -251,7 +379,7 @@ class VoiceRegistry:
             export_file = Path(export_path)
             export_file.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(export_file, 'w', encoding='utf-8') as f:
+            with self._lock, open(export_file, 'w', encoding='utf-8') as f:
                 json.dump(self.registry, f, indent=2, ensure_ascii=False)
             
             logger.info(f"Voice registry exported to {export_path}")
@@ -275,12 +403,31 @@ class VoiceRegistry:
                 imported_registry = json.load(f)
             
             # Merge with existing registry
-            self.registry["characters"].update(imported_registry.get("characters", {}))
-            self.registry["voice_usage"].update(imported_registry.get("voice_usage", {}))
-            
-            # Save merged registry
-            self._save_registry()
+            with self._lock:
+                self._statistics_cache = None
+                self._updated_characters.update(imported_registry.get("characters", {}))
+                self.registry["characters"].update(imported_registry.get("characters", {}))
+                self.registry["voice_usage"].update(imported_registry.get("voice_usage", {}))
+                
+                # Save merged registry
+                self._save_registry()
             
             logger.info(f"Voice registry imported from {import_path}")
         except Exception as e:
             logger.error(f"Error importing voice registry: {e}")
+
+
+_default_registry = None
+
+
+def get_default_registry() -> VoiceRegistry:
+    """
+    Get the shared default voice registry
+    
+    Returns:
+        Process-wide VoiceRegistry backed by the default registry file
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = VoiceRegistry()
+    return _default_registry